@@ -12,11 +12,61 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import functools
+
 from acts import utils
 from acts.controllers.ap_lib import hostapd_config
 from acts.controllers.ap_lib import hostapd_constants
 
 
+# Maps (hex, lowercase security mode) to the password generator and default
+# length used by generate_random_password. Modes other than WEP use the
+# (hex, None) entry.
+_PASSWORD_DISPATCH = {
+    (False, hostapd_constants.WEP_STRING.lower()):
+    (utils.rand_ascii_str, hostapd_constants.WEP_DEFAULT_STR_LENGTH),
+    (False, None): (utils.rand_ascii_str, hostapd_constants.MIN_WPA_PSK_LENGTH),
+    (True, hostapd_constants.WEP_STRING.lower()):
+    (utils.rand_hex_str, hostapd_constants.WEP_DEFAULT_STR_LENGTH),
+    (True, None): (utils.rand_hex_str, hostapd_constants.MIN_WPA_PSK_LENGTH),
+}
+
+
+class _InvalidSecurityMode(ValueError):
+    """Raised when a profile's security mode is not in the valid modes.
+
+    The message is only formatted when the error is printed, so callers that
+    catch and discard it never pay for the repr of the valid mode list.
+    """
+    def __init__(self, security_mode, valid_security_modes):
+        super().__init__(security_mode, valid_security_modes)
+        self.security_mode = security_mode
+        self.valid_security_modes = valid_security_modes
+
+    def __str__(self):
+        return ('Invalid Security Mode: %s. '
+                'Valid Security Modes for this profile: %s.' %
+                (self.security_mode, list(self.valid_security_modes)))
+
+
+class _InvalidCipher(ValueError):
+    """Raised when a profile's WPA/WPA2 cipher is not in the valid ciphers.
+
+    Like _InvalidSecurityMode, the message is formatted on demand.
+    """
+    def __init__(self, wpa_version, cipher, valid_ciphers):
+        super().__init__(wpa_version, cipher, valid_ciphers)
+        self.wpa_version = wpa_version
+        self.cipher = cipher
+        self.valid_ciphers = valid_ciphers
+
+    def __str__(self):
+        return ('Invalid %s Cipher: %s. '
+                'Valid %s Ciphers for this profile: %s' %
+                (self.wpa_version, self.cipher, self.wpa_version,
+                 list(self.valid_ciphers)))
+
+
 def generate_random_password(security_mode=None, length=None, hex=None):
     """Generates a random password. Defaults to an 8 character ASCII password.
 
@@ -28,17 +78,20 @@ def generate_random_password(security_mode=None, length=None, hex=None):
             unless security_mode is WEP, then 13
         hex: optional int, if True, generates a hex string, else ascii
     """
-    if hex:
-        generator_func = utils.rand_hex_str
-    else:
-        generator_func = utils.rand_ascii_str
+    key = (bool(hex), security_mode.lower() if security_mode else None)
+    generator_func, default_length = _PASSWORD_DISPATCH.get(
+        key, _PASSWORD_DISPATCH[(bool(hex), None)])
+    return generator_func(length or default_length)
 
-    if length:
-        return generator_func(length)
-    if security_mode and security_mode.lower() == hostapd_constants.WEP_STRING:
-        return generator_func(hostapd_constants.WEP_DEFAULT_STR_LENGTH)
-    else:
-        return generator_func(hostapd_constants.MIN_WPA_PSK_LENGTH)
+
+@functools.lru_cache(maxsize=64)
+def _as_frozenset(values):
+    """Returns a tuple of valid values as a frozenset for O(1) lookups.
+
+    Cached so the same constant list (e.g. INTERFACE_2G_LIST) is only hashed
+    once, no matter how many different values are checked against it.
+    """
+    return frozenset(values)
 
 
 def verify_interface(interface, valid_interfaces):
@@ -47,10 +100,21 @@ def verify_interface(interface, valid_interfaces):
         interface: string of interface name
         valid_interfaces: list of valid interface names
     """
+    error = _verify_interface_cached(interface, tuple(valid_interfaces))
+    if error:
+        raise error()
+
+
+@functools.lru_cache(maxsize=256)
+def _verify_interface_cached(interface, valid_interfaces):
+    """Returns a callable building the error for verify_interface, or None."""
     if not interface:
-        raise ValueError('Required wlan interface is missing.')
-    if interface not in valid_interfaces:
-        raise ValueError('Invalid interface name was passed: %s' % interface)
+        return functools.partial(ValueError,
+                                 'Required wlan interface is missing.')
+    if interface not in _as_frozenset(valid_interfaces):
+        return functools.partial(
+            ValueError, 'Invalid interface name was passed: %s' % interface)
+    return None
 
 
 def verify_security_mode(security_profile, valid_security_modes):
@@ -62,13 +126,27 @@ def verify_security_mode(security_profile, valid_security_modes):
             include None if open security is valid.
     """
     if security_profile is None:
-        if None not in valid_security_modes:
-            raise ValueError('Open security is not allowed for this profile.')
-    elif security_profile.security_mode not in valid_security_modes:
-        raise ValueError(
-            'Invalid Security Mode: %s. '
-            'Valid Security Modes for this profile: %s.' %
-            (security_profile.security_mode, valid_security_modes))
+        error = _verify_security_mode_cached(True, None,
+                                             tuple(valid_security_modes))
+    else:
+        error = _verify_security_mode_cached(False,
+                                             security_profile.security_mode,
+                                             tuple(valid_security_modes))
+    if error:
+        raise error()
+
+
+@functools.lru_cache(maxsize=256)
+def _verify_security_mode_cached(is_open, security_mode, valid_security_modes):
+    """Returns a callable building the error for verify_security_mode, or None."""
+    if is_open:
+        if None not in _as_frozenset(valid_security_modes):
+            return functools.partial(
+                ValueError, 'Open security is not allowed for this profile.')
+    elif security_mode not in _as_frozenset(valid_security_modes):
+        return functools.partial(_InvalidSecurityMode, security_mode,
+                                 valid_security_modes)
+    return None
 
 
 def verify_cipher(security_profile, valid_ciphers):
@@ -80,16 +158,27 @@ def verify_cipher(security_profile, valid_ciphers):
     """
     if security_profile is None:
         raise ValueError('Security mode is open.')
-    elif security_profile.security_mode == hostapd_constants.WPA1:
-        if security_profile.wpa_cipher not in valid_ciphers:
-            raise ValueError('Invalid WPA Cipher: %s. '
-                             'Valid WPA Ciphers for this profile: %s' %
-                             (security_profile.wpa_cipher, valid_ciphers))
-    elif security_profile.security_mode == hostapd_constants.WPA2:
-        if security_profile.wpa2_cipher not in valid_ciphers:
-            raise ValueError('Invalid WPA2 Cipher: %s. '
-                             'Valid WPA2 Ciphers for this profile: %s' %
-                             (security_profile.wpa2_cipher, valid_ciphers))
+    error = _verify_cipher_cached(security_profile.security_mode,
+                                  security_profile.wpa_cipher,
+                                  security_profile.wpa2_cipher,
+                                  tuple(valid_ciphers))
+    if error:
+        raise error()
+
+
+@functools.lru_cache(maxsize=256)
+def _verify_cipher_cached(security_mode, wpa_cipher, wpa2_cipher,
+                          valid_ciphers):
+    """Returns a callable building the error for verify_cipher, or None."""
+    if security_mode == hostapd_constants.WPA1:
+        if wpa_cipher not in _as_frozenset(valid_ciphers):
+            return functools.partial(_InvalidCipher, 'WPA', wpa_cipher,
+                                     valid_ciphers)
+    elif security_mode == hostapd_constants.WPA2:
+        if wpa2_cipher not in _as_frozenset(valid_ciphers):
+            return functools.partial(_InvalidCipher, 'WPA2', wpa2_cipher,
+                                     valid_ciphers)
     else:
-        raise ValueError('Invalid Security Mode: %s' %
-                         security_profile.security_mode)
+        return functools.partial(
+            ValueError, 'Invalid Security Mode: %s' % security_mode)
+    return None
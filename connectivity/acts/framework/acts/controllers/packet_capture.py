@@ -245,7 +245,7 @@ class PacketCapture(object):
             return False
         return True
 
-    def start_packet_capture(self, band, log_path, pcap_fname):
+    def start_packet_capture(self, band, log_path, pcap_fname, extra_args=''):
         """Start packet capture for band.
 
         band = 2G starts tcpdump on 'mon0' interface.
@@ -255,6 +255,8 @@ class PacketCapture(object):
             band: '2g' or '2G' and '5g' or '5G'.
             log_path: test log path to save the pcap file.
             pcap_fname: name of the pcap file.
+            extra_args: A string of extra tcpdump options, e.g. a snapshot
+                length or buffer size.
 
         Returns:
             pcap_proc: Process object of the tcpdump.
@@ -268,7 +270,8 @@ class PacketCapture(object):
         pcap_fname = os.path.join(log_path, pcap_name)
         pcap_file = open(pcap_fname, 'w+b')
 
-        tcpdump_cmd = 'tcpdump -i %s -w - -U 2>/dev/null' % (BAND_IFACE[band])
+        tcpdump_cmd = 'tcpdump -i %s %s -w - -U 2>/dev/null' % (
+            BAND_IFACE[band], extra_args)
         cmd = formatter.SshFormatter().format_command(
             tcpdump_cmd, None, self.ssh_settings, extra_flags={'-q': None})
         pcap_proc = Process(cmd)
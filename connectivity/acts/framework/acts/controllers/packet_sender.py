@@ -15,23 +15,62 @@
 #   limitations under the License.
 """Collection of utility functions to generate and send custom packets.
 
+Generators build the packet for their default arguments once and return
+that same object from every generate() call that doesn't override a field,
+so copy() a generated packet before modifying it.
+
+Except for RaGenerator and Dot3Generator, generators also provide
+generate_raw(), which takes the same arguments as generate() and returns the
+frame bytes built directly with struct, for senders that don't need a scapy
+packet.
 """
+import functools
+import importlib
+import itertools
 import logging
-import multiprocessing
+import os
 import socket
+import struct
+import threading
 import time
 
 import acts.signals
+from acts.controllers.packet_sender_lib import clock
+from acts.controllers.packet_sender_lib import fast_packets
+from acts.controllers.packet_sender_lib import raw_socket
 
-# http://www.secdev.org/projects/scapy/
-# On ubuntu, sudo pip3 install scapy
-import scapy.all as scapy
+
+class _LazyScapy(object):
+    """Stands in for scapy.all until one of its attributes is first used.
+
+    Importing scapy.all loads hundreds of modules, so it is deferred until a
+    packet or a scapy socket is actually needed.
+    """
+
+    def __getattr__(self, name):
+        return getattr(_import_scapy(), name)
+
+
+def _import_scapy():
+    """Replaces the _LazyScapy stand-in with scapy.all and returns it."""
+    global scapy
+    if isinstance(scapy, _LazyScapy):
+        # http://www.secdev.org/projects/scapy/
+        # On ubuntu, sudo pip3 install scapy
+        scapy = importlib.import_module('scapy.all')
+        _warm_up_layers()
+    return scapy
+
+
+scapy = _LazyScapy()
 
 MOBLY_CONTROLLER_CONFIG_NAME = 'PacketSender'
 ACTS_CONTROLLER_REFERENCE_NAME = 'packet_senders'
 
 GET_FROM_LOCAL_INTERFACE = 'get_local'
 MAC_BROADCAST = 'ff:ff:ff:ff:ff:ff'
+# Source address of the frames built by _warm_up_layers()
+WARM_UP_MAC = '02:00:00:00:00:01'
 IPV4_BROADCAST = '255.255.255.255'
 ARP_DST = '00:00:00:00:00:00'
 RA_MAC = '33:33:00:00:00:01'
@@ -61,18 +100,46 @@ SNAP_DSAP = 170
 SNAP_CTRL = 3
 LLC_XID_CONTROL = 191
 PAD_LEN_BYTES = 128
+_PAD_PAYLOAD = bytes(PAD_LEN_BYTES)
+ARP_OPS = {'who-has': 1, 'is-at': 2}
+# How long get_if_addr6() reuses its view of the interface addresses (s)
+IF_ADDR6_CACHE_TTL = 1
+# (interface, address type) -> address, read from scapy.in6_getifaddr() at
+# _if_addr6_index_time, see get_if_addr6()
+_if_addr6_index = {}
+_if_addr6_index_time = None
+# How far ahead of their transmit time SO_TXTIME frames are queued (ns)
+TXTIME_LOOKAHEAD_NS = 100000000
+# Margin between queueing a SO_TXTIME batch and its first transmit time (ns)
+TXTIME_LEAD_NS = 2000000
 
 
 def create(configs):
     """Creates PacketSender controllers from a json config.
 
     Args:
-        The json configs that represent this controller
+        The json configs that represent this controller. Each entry is either
+        an interface name, or a dict with an 'interface' key and the optional
+        keys 'txtime', 'cpu_core' and 'sched_priority' (see PacketSender).
 
     Returns:
         A new PacketSender
     """
-    return [PacketSender(c) for c in configs]
+    results = []
+    for c in configs:
+        if type(c) is str:
+            results.append(PacketSender(c))
+        elif type(c) is dict and 'interface' in c:
+            results.append(
+                PacketSender(c['interface'],
+                             txtime=c.get('txtime', False),
+                             cpu_core=c.get('cpu_core'),
+                             sched_priority=c.get('sched_priority')))
+        else:
+            raise ValueError(
+                'Config entry %s in %s is not a valid PacketSender config.' %
+                (c, configs))
+    return results
 
 
 def destroy(objs):
@@ -83,9 +150,59 @@ def destroy(objs):
     """
     for pkt_sender in objs:
         pkt_sender.stop_sending(True)
+        pkt_sender.close()
     return
 
 
+def _interval_ns(interval):
+    """Returns a positive interval (s) in ns, rounded up to at least 1."""
+    return max(1, int(interval * clock.NSEC_PER_SEC))
+
+
+def _send_with_txtime(sock, raw_packets, interval, count=None,
+                      stop_signal=None):
+    """Sends a frame every interval seconds, leaving the pacing to the kernel.
+
+    Frames are stamped with SO_TXTIME transmit times and handed over in
+    batches covering at most TXTIME_LOOKAHEAD_NS, so the sender only wakes up
+    once per batch instead of once per frame.
+
+    Args:
+        sock: raw socket with raw_socket.enable_txtime() applied
+        raw_packets: list of serialized frames, sent in order and repeated
+        interval: interval between consecutive frames (s), greater than 0
+        count: number of frames to send, or None to send until stop_signal
+        stop_signal: event checked between batches (Optional)
+    """
+    step = _interval_ns(interval)
+    per_batch = max(1, min(raw_socket.MAX_BATCH, TXTIME_LOOKAHEAD_NS // step))
+    frames = itertools.cycle(raw_packets)
+    full_batch = None
+    if per_batch >= len(raw_packets):
+        # A whole number of passes per batch lets every batch be the same
+        per_batch -= per_batch % len(raw_packets)
+        full_batch = raw_socket.FrameBatch(
+            list(itertools.islice(frames, per_batch)), txtime=True)
+    start = clock.monotonic_ns() + TXTIME_LEAD_NS
+    sent = 0
+    while count is None or sent < count:
+        if stop_signal is not None and stop_signal.is_set():
+            return
+        size = per_batch if count is None else min(per_batch, count - sent)
+        if full_batch is not None and size == per_batch:
+            batch = full_batch
+        else:
+            batch = raw_socket.FrameBatch(
+                list(itertools.islice(frames, size)), txtime=True)
+        first = start + sent * step
+        batch.set_txtimes(range(first, first + len(batch) * step, step))
+        clock.sleep_until_ns(first - TXTIME_LEAD_NS)
+        batch.send(sock)
+        sent += len(batch)
+    # Like the sleep-based loop, return once the last interval has elapsed.
+    clock.sleep_until_ns(start + count * step)
+
+
 def get_info(objs):
     """Get information on a list of packet senders.
 
@@ -98,41 +215,139 @@ def get_info(objs):
     return [pkt_sender.interface for pkt_sender in objs]
 
 
-class ThreadSendPacket(multiprocessing.Process):
-    """Creates a thread that keeps sending the same packet until a stop signal.
+class ThreadSendPacket(threading.Thread):
+    """Creates a thread that keeps sending packets until a stop signal.
 
     Attributes:
         stop_signal: signal to stop the thread execution
-        packet: desired packet to keep sending
+        raw_packets: serialized packets to keep sending, in order
         interval: interval between consecutive packets (s)
-        interface: network interface name (e.g., 'eth0')
+        sock: socket used to send the packet, owned by the PacketSender
         log: object used for logging
+        txtime: whether sock has SO_TXTIME enabled for kernel pacing
+        cpu_core: CPU the thread is pinned to, or None
+        sched_priority: SCHED_FIFO priority of the thread, or None
+        ring: raw_socket.TxRing holding raw_packets, used instead of sock
+            when given. The thread closes it when done.
     """
 
-    def __init__(self, signal, packet, interval, interface, log):
-        multiprocessing.Process.__init__(self)
+    def __init__(self,
+                 signal,
+                 raw_packets,
+                 interval,
+                 sock,
+                 log,
+                 txtime=False,
+                 cpu_core=None,
+                 sched_priority=None,
+                 ring=None):
+        threading.Thread.__init__(self)
         self.stop_signal = signal
-        self.packet = packet
+        self.raw_packets = raw_packets
         self.interval = interval
-        self.interface = interface
+        self.sock = sock
         self.log = log
+        self.txtime = txtime
+        self.cpu_core = cpu_core
+        self.sched_priority = sched_priority
+        self.ring = ring
 
     def run(self):
+        self._set_scheduling()
         self.log.info('Packet Sending Started.')
-        while True:
-            if self.stop_signal.is_set():
+        if self.ring is not None:
+            self._run_ring()
+            return
+        if self.interval == 0 and raw_socket.is_supported():
+            self._run_batched()
+            return
+        if self.txtime:
+            try:
+                _send_with_txtime(self.sock,
+                                  self.raw_packets,
+                                  self.interval,
+                                  stop_signal=self.stop_signal)
                 # Poison pill means shutdown
                 self.log.info('Packet Sending Stopped.')
-                break
+            except OSError:
+                _log_exception(self.log,
+                               'Exception when trying to send packet')
+            return
+
+        # Sleep until absolute deadlines so send time doesn't add up as drift
+        step = _interval_ns(self.interval)
+        deadline = clock.monotonic_ns()
+        frames = itertools.cycle(self.raw_packets)
+        try:
+            while not self.stop_signal.is_set():
+                self.sock.send(next(frames))
+                deadline += step
+                clock.sleep_until_ns(deadline)
+            # Poison pill means shutdown
+            self.log.info('Packet Sending Stopped.')
+        except OSError:
+            _log_exception(self.log, 'Exception when trying to send packet')
+
+    def stop(self):
+        """Stops sending and waits for the thread to finish."""
+        self.stop_signal.set()
+        self.join()
 
+    def _set_scheduling(self):
+        """Applies the CPU affinity and scheduling policy to this thread.
+
+        On Linux, pid 0 refers to the calling thread, so the rest of the
+        process is left untouched. Failures (e.g., missing CAP_SYS_NICE) are
+        logged and the thread keeps its inherited settings.
+        """
+        if self.cpu_core is not None:
             try:
-                scapy.sendp(self.packet, iface=self.interface, verbose=0)
-                time.sleep(self.interval)
-            except Exception:
-                self.log.exception('Exception when trying to send packet')
-                return
+                os.sched_setaffinity(0, {self.cpu_core})
+            except (AttributeError, OSError) as e:
+                self.log.warning('Could not pin send thread to CPU %s: %s',
+                                 self.cpu_core, e)
+        if self.sched_priority is not None:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO,
+                                      os.sched_param(self.sched_priority))
+            except (AttributeError, OSError) as e:
+                self.log.warning('Could not set SCHED_FIFO priority %s: %s',
+                                 self.sched_priority, e)
 
-        return
+    def _run_ring(self):
+        """Sends the packets back to back through the TX ring.
+
+        The stop signal is checked once per pass over the ring.
+        """
+        try:
+            while not self.stop_signal.is_set():
+                self.ring.send()
+            # Poison pill means shutdown
+            self.log.info('Packet Sending Stopped.')
+        except OSError:
+            _log_exception(self.log, 'Exception when trying to send packet')
+        finally:
+            self.ring.close()
+
+    def _run_batched(self):
+        """Sends the packets back to back, one sendmmsg batch at a time.
+
+        The stop signal is checked between batches rather than per packet.
+        """
+        passes = raw_socket.MAX_BATCH // len(self.raw_packets)
+        if passes:
+            batch = raw_socket.FrameBatch(self.raw_packets * passes)
+            send = functools.partial(batch.send, self.sock)
+        else:
+            send = functools.partial(raw_socket.send_batch, self.sock,
+                                     self.raw_packets)
+        try:
+            while not self.stop_signal.is_set():
+                send()
+            # Poison pill means shutdown
+            self.log.info('Packet Sending Stopped.')
+        except OSError:
+            _log_exception(self.log, 'Exception when trying to send packet')
 
 
 class PacketSenderError(acts.signals.ControllerError):
@@ -148,20 +363,78 @@ class PacketSender(object):
         thread_send: thread object for the concurrent packet transmissions
         stop_signal: event to stop the thread
         interface: network interface name (e.g., 'eth0')
+        txtime: whether paced sends are timed by the kernel with SO_TXTIME
+        cpu_core: CPU the start_sending() thread is pinned to, or None
+        sched_priority: SCHED_FIFO priority of the start_sending() thread, or
+            None to keep the default scheduling policy
     """
 
-    def __init__(self, ifname):
+    def __init__(self, ifname, txtime=False, cpu_core=None,
+                 sched_priority=None):
         """Initiallize the PacketGenerator class.
 
         Args:
             ifname: network interface name that will be used packet generator
+            txtime: if True, paced sends stamp frames with SO_TXTIME transmit
+                times instead of sleeping between packets. The interface must
+                use the fq or etf qdisc, otherwise frames are sent unpaced.
+                Falls back to sleeping if the kernel lacks SO_TXTIME.
+            cpu_core: if set, pins the start_sending() thread to this CPU.
+            sched_priority: if set, runs the start_sending() thread with the
+                SCHED_FIFO policy at this priority (1-99) to reduce interval
+                jitter. Requires CAP_SYS_NICE.
         """
-        self.log = logging.getLogger()
+        self.log = logging.getLogger(__name__)
         self.packet = None
         self.thread_active = False
         self.thread_send = None
-        self.stop_signal = multiprocessing.Event()
+        self.stop_signal = threading.Event()
         self.interface = ifname
+        self.txtime = txtime
+        self.cpu_core = cpu_core
+        self.sched_priority = sched_priority
+        self._l2 = None
+        self._txtime_enabled = False
+        self._rx = None
+        self._rx_filter = None
+        # Threads started by send_forever()
+        self._forever_threads = []
+
+    def _get_socket(self):
+        """Returns the send socket for the interface, opening it on first use.
+
+        On Linux this is a transmit-only raw socket that also supports
+        batched sends; elsewhere it is a scapy L2 socket.
+        """
+        if self._l2 is None:
+            if raw_socket.is_supported():
+                self._l2 = raw_socket.open_socket(self.interface)
+                if self.txtime:
+                    self._txtime_enabled = raw_socket.enable_txtime(self._l2)
+                    if not self._txtime_enabled:
+                        self.log.warning('SO_TXTIME is not supported, '
+                                         'pacing packets with sleep.')
+            else:
+                self._l2 = scapy.conf.L2socket(iface=self.interface)
+        return self._l2
+
+    def close(self):
+        """Stops sending threads and closes the sockets, if open.
+
+        Both the start_sending() thread and any send_forever() threads are
+        stopped first, since they send on the sockets being closed.
+        """
+        self.stop_sending(ignore_status=True)
+        for thread in self._forever_threads:
+            thread.stop()
+        self._forever_threads = []
+        if self._l2 is not None:
+            self._l2.close()
+            self._l2 = None
+            self._txtime_enabled = False
+        if self._rx is not None:
+            self._rx.close()
+            self._rx = None
 
     def send_ntimes(self, packet, ntimes, interval):
         """Sends a packet ntimes at a given interval.
@@ -175,17 +448,67 @@ class PacketSender(object):
             raise PacketSenderError(
                 'There is no packet to send. Create a packet first.')
 
-        for _ in range(ntimes):
-            try:
-                scapy.sendp(packet, iface=self.interface, verbose=0)
-                time.sleep(interval)
-            except socket.error as excpt:
-                self.log.exception('Caught socket exception : %s' % excpt)
-                return
+        # Serialize once; the packet does not change between sends.
+        self._send([bytes(packet)], ntimes, interval)
+
+    def send_batch(self, packets, interval=0):
+        """Sends a sequence of packets once, in order.
+
+        Unlike calling send_ntimes() per packet, back to back sends
+        (interval 0) hand the whole sequence to the kernel in batches.
+
+        Args:
+            packets: list of custom built packets (or their bytes)
+            interval: interval between consecutive packet transmissions (s)
+        """
+        if not packets:
+            raise PacketSenderError(
+                'There is no packet to send. Create a packet first.')
+
+        self._send([bytes(p) for p in packets], len(packets), interval)
+
+    def _send(self, raw_packets, count, interval):
+        """Sends count frames, cycling through raw_packets.
+
+        Args:
+            raw_packets: list of serialized frames
+            count: number of frames to send
+            interval: interval between consecutive frames (s)
+        """
+        sock = self._get_socket()
+        # A socket error ends the whole transmission, so a single handler
+        # outside the loops is enough.
+        try:
+            if interval == 0 and raw_socket.is_supported():
+                if len(raw_packets) == 1:
+                    raw_socket.send_repeated(sock, raw_packets[0], count)
+                else:
+                    raw_socket.send_batch(
+                        sock,
+                        itertools.islice(itertools.cycle(raw_packets), count))
+            elif self._txtime_enabled:
+                _send_with_txtime(sock, raw_packets, interval, count=count)
+            else:
+                # Sleep until absolute deadlines so send time doesn't add up
+                # as drift
+                step = _interval_ns(interval)
+                deadline = clock.monotonic_ns()
+                frames = itertools.cycle(raw_packets)
+                for _ in range(count):
+                    sock.send(next(frames))
+                    deadline += step
+                    clock.sleep_until_ns(deadline)
+        except socket.error as excpt:
+            _log_exception(self.log, 'Caught socket exception : %s', excpt)
 
     def send_receive_ntimes(self, packet, ntimes, interval):
         """Sends a packet and receives the reply ntimes at a given interval.
 
+        A reply is a frame sent to the packet's source MAC address or to
+        broadcast that, dissected like the packet, answers it in scapy's
+        sense (e.g., an ARP is-at for the requested address, or a BOOTP
+        message with the same transaction id).
+
         Args:
             packet: custom built packet from Layer 2 up to Application layer
             ntimes: number of packets to send
@@ -196,14 +519,55 @@ class PacketSender(object):
             raise PacketSenderError(
                 'There is no packet to send. Create a packet first.')
 
-        for _ in range(ntimes):
-            try:
-                scapy.srp1(
-                    packet, iface=self.interface, timeout=interval, verbose=0)
+        if not raw_socket.is_supported():
+            self._scapy_send_receive_ntimes(packet, ntimes, interval)
+            return
+
+        # The kernel filter only passes frames to the sender or broadcast
+        # with the same ethertype; those are dissected to find the reply.
+        raw = bytes(packet)
+        ethertype = struct.unpack('!H', raw[12:14])[0]
+        if ethertype < raw_socket.ETH_MIN_TYPE:
+            ethertype = None
+        sock = self._get_socket()
+        rx_sock = self._get_rx_socket(raw[6:12], ethertype)
+        is_reply = functools.partial(_is_reply, packet)
+        try:
+            for _ in range(ntimes):
+                raw_socket.drain(rx_sock)
+                sock.send(raw)
+                raw_socket.wait_for_frame(rx_sock, interval, is_reply)
                 time.sleep(interval)
-            except socket.error as excpt:
-                self.log.exception('Caught socket exception : %s' % excpt)
-                return
+        except socket.error as excpt:
+            _log_exception(self.log, 'Caught socket exception : %s', excpt)
+
+    def _scapy_send_receive_ntimes(self, packet, ntimes, interval):
+        """send_receive_ntimes() for hosts without raw packet sockets."""
+        # Replies need a receiving socket, so this cannot share the
+        # transmit-only socket; open one for the duration of the call.
+        sock = scapy.conf.L2socket(iface=self.interface)
+        try:
+            for _ in range(ntimes):
+                sock.sr1(packet, timeout=interval, verbose=0)
+                time.sleep(interval)
+        except socket.error as excpt:
+            _log_exception(self.log, 'Caught socket exception : %s', excpt)
+        finally:
+            sock.close()
+
+    def _get_rx_socket(self, dst_mac, ethertype):
+        """Returns a socket receiving frames to dst_mac of ethertype.
+
+        The socket is kept open for later calls with the same filter.
+        """
+        if self._rx is not None and self._rx_filter != (dst_mac, ethertype):
+            self._rx.close()
+            self._rx = None
+        if self._rx is None:
+            self._rx = raw_socket.open_rx_socket(self.interface, dst_mac,
+                                                 ethertype)
+            self._rx_filter = (dst_mac, ethertype)
+        return self._rx
 
     def start_sending(self, packet, interval):
         """Sends packets in parallel with the main process.
@@ -224,11 +588,53 @@ class PacketSender(object):
                 ('There is already an active thread. Stop it'
                  'before starting another transmission.'))
 
-        self.thread_send = ThreadSendPacket(self.stop_signal, packet, interval,
-                                            self.interface, self.log)
-        self.thread_send.start()
+        self.thread_send = self._start_thread(self.stop_signal,
+                                              [bytes(packet)], interval)
         self.thread_active = True
 
+    def send_forever(self, packets, interval):
+        """Keeps sending a sequence of packets in a background thread.
+
+        The packets are sent in order and the sequence is repeated until the
+        returned handle is stopped. Several of these can run at once, next to
+        start_sending(); all of them are stopped by close().
+
+        Args:
+            packets: list of custom built packets (or their bytes)
+            interval: interval between consecutive packets (s)
+
+        Returns:
+            The ThreadSendPacket sending the packets; call its stop() method
+            to stop it.
+        """
+        if not packets:
+            raise PacketSenderError(
+                'There is no packet to send. Create a packet first.')
+
+        thread = self._start_thread(threading.Event(),
+                                    [bytes(p) for p in packets], interval)
+        self._forever_threads.append(thread)
+        return thread
+
+    def _start_thread(self, signal, raw_packets, interval):
+        """Starts a ThreadSendPacket on the shared send socket.
+
+        Back to back sends get a TX ring of their own when the kernel
+        supports it.
+        """
+        ring = None
+        if interval == 0 and raw_socket.is_supported():
+            try:
+                ring = raw_socket.TxRing(self.interface, raw_packets)
+            except OSError as e:
+                self.log.debug('TX ring unavailable, using sendmmsg: %s', e)
+        thread = ThreadSendPacket(signal, raw_packets, interval,
+                                  self._get_socket(), self.log,
+                                  self._txtime_enabled, self.cpu_core,
+                                  self.sched_priority, ring)
+        thread.start()
+        return thread
+
     def stop_sending(self, ignore_status=False):
         """Stops the concurrent thread that is continuously sending packets.
 
@@ -244,11 +650,6 @@ class PacketSender(object):
         self.stop_signal.set()
         self.thread_send.join()
 
-        # Just as precaution
-        if self.thread_send.is_alive():
-            self.thread_send.terminate()
-            self.log.warning('Packet Sending forced to terminate')
-
         self.stop_signal.clear()
         self.thread_send = None
         self.thread_active = False
@@ -279,16 +680,24 @@ class ArpGenerator(object):
         interf = config_params['interf']
         self.packet = None
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         self.dst_ipv4 = config_params['dst_ipv4']
         if config_params['src_ipv4'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv4 = scapy.get_if_addr(interf)
+            self.src_ipv4 = _if_addr(interf)
         else:
             self.src_ipv4 = config_params['src_ipv4']
 
+        self._src_mac_bytes = fast_packets.mac_to_bytes(self.src_mac)
+        self._src_ipv4_bytes = fast_packets.ipv4_to_bytes(self.src_ipv4)
+        self._dst_ipv4_bytes = fast_packets.ipv4_to_bytes(self.dst_ipv4)
+
+        # Packet for the default arguments, see generate()
+        self._template = self._build()
+        self._raw_template = self._build_raw()
+
     def generate(self,
                  op='who-has',
                  ip_dst=None,
@@ -306,20 +715,71 @@ class ArpGenerator(object):
             hwdst: ARP hardware destination address (Optional)
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
+        self.packet = self._packet(op, ip_dst, ip_src, hwsrc, hwdst, eth_dst)
+        return self.packet
+
+    def _packet(self, op, ip_dst, ip_src, hwsrc, hwdst, eth_dst):
+        """Returns the packet for the arguments of generate()."""
+        return _override(self._template,
+                         (scapy.ARP, 'op', op if op != 'who-has' else None),
+                         (scapy.ARP, 'pdst', ip_dst),
+                         (scapy.ARP, 'psrc', ip_src),
+                         (scapy.ARP, 'hwsrc', hwsrc),
+                         (scapy.ARP, 'hwdst', hwdst),
+                         (scapy.Ether, 'dst', eth_dst))
+
+    def _build(self):
+        """Builds the packet returned by generate() for its defaults."""
         # Create IP layer
-        hw_src = (hwsrc if hwsrc is not None else self.src_mac)
-        hw_dst = (hwdst if hwdst is not None else ARP_DST)
-        ipv4_dst = (ip_dst if ip_dst is not None else self.dst_ipv4)
-        ipv4_src = (ip_src if ip_src is not None else self.src_ipv4)
-        ip4 = scapy.ARP(
-            op=op, pdst=ipv4_dst, psrc=ipv4_src, hwdst=hw_dst, hwsrc=hw_src)
+        ip4 = scapy.ARP(op='who-has',
+                        pdst=self.dst_ipv4,
+                        psrc=self.src_ipv4,
+                        hwdst=ARP_DST,
+                        hwsrc=self.src_mac)
 
         # Create Ethernet layer
-        mac_dst = (eth_dst if eth_dst is not None else MAC_BROADCAST)
-        ethernet = scapy.Ether(src=self.src_mac, dst=mac_dst)
-
-        self.packet = ethernet / ip4
-        return self.packet
+        ethernet = scapy.Ether(src=self.src_mac, dst=MAC_BROADCAST)
+
+        return ethernet / ip4
+
+    def generate_raw(self,
+                     op='who-has',
+                     ip_dst=None,
+                     ip_src=None,
+                     hwsrc=None,
+                     hwdst=None,
+                     eth_dst=None):
+        """Same as generate(), but returns the frame as bytes."""
+        if (op == 'who-has' and ip_dst is None and ip_src is None and
+                hwsrc is None and hwdst is None and eth_dst is None):
+            return self._raw_template
+        opcode = ARP_OPS.get(op, op)
+        if not isinstance(opcode, int):
+            # Uncommon op names are only known to scapy
+            return bytes(
+                self._packet(op, ip_dst, ip_src, hwsrc, hwdst, eth_dst))
+        return self._build_raw(opcode, ip_dst, ip_src, hwsrc, hwdst, eth_dst)
+
+    def _build_raw(self,
+                   opcode=ARP_OPS['who-has'],
+                   ip_dst=None,
+                   ip_src=None,
+                   hwsrc=None,
+                   hwdst=None,
+                   eth_dst=None):
+        """Builds the frame returned by generate_raw()."""
+        return fast_packets.build_arp(
+            self._src_mac_bytes,
+            fast_packets.mac_to_bytes(
+                eth_dst if eth_dst is not None else MAC_BROADCAST),
+            (fast_packets.mac_to_bytes(hwsrc)
+             if hwsrc is not None else self._src_mac_bytes),
+            (fast_packets.ipv4_to_bytes(ip_src)
+             if ip_src is not None else self._src_ipv4_bytes),
+            fast_packets.mac_to_bytes(hwdst if hwdst is not None else ARP_DST),
+            (fast_packets.ipv4_to_bytes(ip_dst)
+             if ip_dst is not None else self._dst_ipv4_bytes),
+            opcode)
 
 
 class DhcpOfferGenerator(object):
@@ -352,17 +812,34 @@ class DhcpOfferGenerator(object):
         self.subnet_mask = config_params['subnet_mask']
         self.dst_mac = config_params['dst_mac']
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         self.dst_ipv4 = config_params['dst_ipv4']
         if config_params['src_ipv4'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv4 = scapy.get_if_addr(interf)
+            self.src_ipv4 = _if_addr(interf)
         else:
             self.src_ipv4 = config_params['src_ipv4']
 
         self.gw_ipv4 = config_params['gw_ipv4']
+        self._dst_mac_bytes = scapy.mac2str(self.dst_mac)
+        # The DHCP options only depend on the config, so encode them once
+        self._dhcp_raw = bytes(
+            scapy.DHCP(options=[
+                ('message-type', 'offer'),
+                ('subnet_mask', self.subnet_mask),
+                ('server_id', self.src_ipv4),
+                ('end'),
+            ]))
+
+        self._src_mac_bytes = fast_packets.mac_to_bytes(self.src_mac)
+        self._src_ipv4_bytes = fast_packets.ipv4_to_bytes(self.src_ipv4)
+        self._gw_ipv4_bytes = fast_packets.ipv4_to_bytes(self.gw_ipv4)
+
+        # Packet for the default arguments, see generate()
+        self._template = self._build()
+        self._raw_template = self._build_raw()
 
     def generate(self, cha_mac=None, dst_ip=None):
         """Generates a DHCP offer packet.
@@ -371,27 +848,26 @@ class DhcpOfferGenerator(object):
             cha_mac: hardware target address for DHCP offer (Optional)
             dst_ip: ipv4 address of target host for renewal (Optional)
         """
+        self.packet = _override(
+            self._template,
+            (scapy.BOOTP, 'chaddr',
+             scapy.mac2str(cha_mac) if cha_mac is not None else None),
+            (scapy.BOOTP, 'yiaddr', dst_ip))
+        return self.packet
 
-        # Create DHCP layer
-        dhcp = scapy.DHCP(options=[
-            ('message-type', 'offer'),
-            ('subnet_mask', self.subnet_mask),
-            ('server_id', self.src_ipv4),
-            ('end'),
-        ])
-
-        # Overwrite standard DHCP fields
-        sta_hw = (cha_mac if cha_mac is not None else self.dst_mac)
-        sta_ip = (dst_ip if dst_ip is not None else self.dst_ipv4)
+    def _build(self):
+        """Builds the packet returned by generate() for its defaults."""
+        # Create DHCP layer from the pre-encoded options
+        dhcp = scapy.Raw(load=self._dhcp_raw)
 
         # Create Boot
-        bootp = scapy.BOOTP(
-            op=DHCP_OFFER_OP,
-            yiaddr=sta_ip,
-            siaddr=self.src_ipv4,
-            giaddr=self.gw_ipv4,
-            chaddr=scapy.mac2str(sta_hw),
-            xid=DHCP_TRANS_ID)
+        bootp = scapy.BOOTP(op=DHCP_OFFER_OP,
+                            yiaddr=self.dst_ipv4,
+                            siaddr=self.src_ipv4,
+                            giaddr=self.gw_ipv4,
+                            chaddr=self._dst_mac_bytes,
+                            xid=DHCP_TRANS_ID,
+                            options=scapy.dhcpmagic)
 
         # Create UDP
         udp = scapy.UDP(sport=DHCP_OFFER_SRC_PORT, dport=DHCP_OFFER_DST_PORT)
@@ -402,8 +878,27 @@ class DhcpOfferGenerator(object):
         # Create Ethernet layer
         ethernet = scapy.Ether(dst=MAC_BROADCAST, src=self.src_mac)
 
-        self.packet = ethernet / ip4 / udp / bootp / dhcp
-        return self.packet
+        return ethernet / ip4 / udp / bootp / dhcp
+
+    def generate_raw(self, cha_mac=None, dst_ip=None):
+        """Same as generate(), but returns the frame as bytes."""
+        if cha_mac is None and dst_ip is None:
+            return self._raw_template
+        return self._build_raw(cha_mac, dst_ip)
+
+    def _build_raw(self, cha_mac=None, dst_ip=None):
+        """Builds the frame returned by generate_raw()."""
+        chaddr = (fast_packets.mac_to_bytes(cha_mac)
+                  if cha_mac is not None else self._dst_mac_bytes)
+        return fast_packets.build_dhcp_offer(
+            self._src_mac_bytes, fast_packets.mac_to_bytes(MAC_BROADCAST),
+            self._src_ipv4_bytes, fast_packets.ipv4_to_bytes(IPV4_BROADCAST),
+            DHCP_OFFER_SRC_PORT, DHCP_OFFER_DST_PORT, DHCP_OFFER_OP,
+            DHCP_TRANS_ID,
+            fast_packets.ipv4_to_bytes(
+                dst_ip if dst_ip is not None else self.dst_ipv4),
+            self._src_ipv4_bytes, self._gw_ipv4_bytes,
+            chaddr.ljust(16, b'\x00'), scapy.dhcpmagic + self._dhcp_raw)
 
 
 class NsGenerator(object):
@@ -432,17 +927,27 @@ class NsGenerator(object):
         interf = config_params['interf']
         self.packet = None
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         self.dst_ipv6 = config_params['dst_ipv6']
         self.src_ipv6_type = config_params['src_ipv6_type']
         if config_params['src_ipv6'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv6 = get_if_addr6(interf, self.src_ipv6_type)
+            self.src_ipv6 = _if_addr6(interf, self.src_ipv6_type)
         else:
             self.src_ipv6 = config_params['src_ipv6']
 
+        # Solicited-node multicast addresses for the default target
+        self._node_mcast, self._default_hw_dst = _solicited_node_addrs(
+            self.dst_ipv6)
+        self._src_mac_bytes = fast_packets.mac_to_bytes(self.src_mac)
+        self._src_ipv6_bytes = fast_packets.ipv6_to_bytes(self.src_ipv6)
+
+        # Packet for the default arguments, see generate()
+        self._template = self._build()
+        self._raw_template = self._build_raw()
+
     def generate(self, ip_dst=None, eth_dst=None):
         """Generates a Neighbor Solicitation (NS) packet (ICMP over IPv6).
 
@@ -450,26 +955,48 @@ class NsGenerator(object):
             ip_dst: NS ipv6 destination (Optional)
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
-        # Compute IP addresses
-        target_ip6 = ip_dst if ip_dst is not None else self.dst_ipv6
-        ndst_ip = socket.inet_pton(socket.AF_INET6, target_ip6)
-        nnode_mcast = scapy.in6_getnsma(ndst_ip)
-        node_mcast = socket.inet_ntop(socket.AF_INET6, nnode_mcast)
-        # Compute MAC addresses
-        hw_dst = (eth_dst
-                  if eth_dst is not None else scapy.in6_getnsmac(nnode_mcast))
+        node_mcast = nsmac = None
+        if ip_dst is not None:
+            node_mcast, nsmac = _solicited_node_addrs(ip_dst)
+        self.packet = _override(
+            self._template, (scapy.IPv6, 'dst', node_mcast),
+            (scapy.ICMPv6ND_NS, 'tgt', ip_dst),
+            (scapy.Ether, 'dst', eth_dst if eth_dst is not None else nsmac))
+        return self.packet
 
+    def _build(self):
+        """Builds the packet returned by generate() for its defaults."""
         # Create IPv6 layer
-        base = scapy.IPv6(dst=node_mcast, src=self.src_ipv6)
-        neighbor_solicitation = scapy.ICMPv6ND_NS(tgt=target_ip6)
+        base = scapy.IPv6(dst=self._node_mcast, src=self.src_ipv6)
+        neighbor_solicitation = scapy.ICMPv6ND_NS(tgt=self.dst_ipv6)
         src_ll_addr = scapy.ICMPv6NDOptSrcLLAddr(lladdr=self.src_mac)
         ip6 = base / neighbor_solicitation / src_ll_addr
 
         # Create Ethernet layer
-        ethernet = scapy.Ether(src=self.src_mac, dst=hw_dst)
+        ethernet = scapy.Ether(src=self.src_mac, dst=self._default_hw_dst)
 
-        self.packet = ethernet / ip6
-        return self.packet
+        return ethernet / ip6
+
+    def generate_raw(self, ip_dst=None, eth_dst=None):
+        """Same as generate(), but returns the frame as bytes."""
+        if ip_dst is None and eth_dst is None:
+            return self._raw_template
+        return self._build_raw(ip_dst, eth_dst)
+
+    def _build_raw(self, ip_dst=None, eth_dst=None):
+        """Builds the frame returned by generate_raw()."""
+        if ip_dst is None:
+            target_ip6 = self.dst_ipv6
+            node_mcast, nsmac = self._node_mcast, self._default_hw_dst
+        else:
+            target_ip6 = ip_dst
+            node_mcast, nsmac = _solicited_node_addrs(ip_dst)
+        return fast_packets.build_ns(
+            self._src_mac_bytes,
+            fast_packets.mac_to_bytes(
+                eth_dst if eth_dst is not None else nsmac),
+            self._src_ipv6_bytes, fast_packets.ipv6_to_bytes(node_mcast),
+            fast_packets.ipv6_to_bytes(target_ip6))
 
 
 class RaGenerator(object):
@@ -497,16 +1024,21 @@ class RaGenerator(object):
         interf = config_params['interf']
         self.packet = None
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         self.src_ipv6_type = config_params['src_ipv6_type']
         if config_params['src_ipv6'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv6 = get_if_addr6(interf, self.src_ipv6_type)
+            self.src_ipv6 = _if_addr6(interf, self.src_ipv6_type)
         else:
             self.src_ipv6 = config_params['src_ipv6']
 
+        # lifetime has no default, so packets for the default destinations
+        # are built on first use and keyed by (lifetime, enableDNS,
+        # dns_lifetime), see generate()
+        self._templates = {}
+
     def generate(self,
                  lifetime,
                  enableDNS=False,
@@ -522,12 +1054,19 @@ class RaGenerator(object):
             ip_dst: IPv6 destination address (Optional)
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
-        # Overwrite standard fields if desired
-        ip6_dst = (ip_dst if ip_dst is not None else RA_IP)
-        hw_dst = (eth_dst if eth_dst is not None else RA_MAC)
+        key = (lifetime, enableDNS, dns_lifetime)
+        if key not in self._templates:
+            self._templates[key] = self._build(lifetime, enableDNS,
+                                               dns_lifetime)
+        self.packet = _override(self._templates[key],
+                                (scapy.IPv6, 'dst', ip_dst),
+                                (scapy.Ether, 'dst', eth_dst))
+        return self.packet
 
+    def _build(self, lifetime, enableDNS=False, dns_lifetime=0):
+        """Builds the packet returned by generate() for default addresses."""
         # Create IPv6 layer
-        base = scapy.IPv6(dst=ip6_dst, src=self.src_ipv6)
+        base = scapy.IPv6(dst=RA_IP, src=self.src_ipv6)
         router_solicitation = scapy.ICMPv6ND_RA(routerlifetime=lifetime)
         src_ll_addr = scapy.ICMPv6NDOptSrcLLAddr(lladdr=self.src_mac)
         prefix = scapy.ICMPv6NDOptPrefixInfo(
@@ -540,10 +1079,9 @@ class RaGenerator(object):
             ip6 = base / router_solicitation / src_ll_addr / prefix
 
         # Create Ethernet layer
-        ethernet = scapy.Ether(src=self.src_mac, dst=hw_dst)
+        ethernet = scapy.Ether(src=self.src_mac, dst=RA_MAC)
 
-        self.packet = ethernet / ip6
-        return self.packet
+        return ethernet / ip6
 
 
 class Ping6Generator(object):
@@ -574,17 +1112,21 @@ class Ping6Generator(object):
         self.packet = None
         self.dst_mac = config_params['dst_mac']
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         self.dst_ipv6 = config_params['dst_ipv6']
         self.src_ipv6_type = config_params['src_ipv6_type']
         if config_params['src_ipv6'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv6 = get_if_addr6(interf, self.src_ipv6_type)
+            self.src_ipv6 = _if_addr6(interf, self.src_ipv6_type)
         else:
             self.src_ipv6 = config_params['src_ipv6']
 
+        # Packet for the default arguments, see generate()
+        self._template = self._build()
+        self._raw_template = self._build_raw()
+
     def generate(self, ip_dst=None, eth_dst=None):
         """Generates a Ping6 packet (i.e., Echo Request)
 
@@ -592,21 +1134,39 @@ class Ping6Generator(object):
             ip_dst: IPv6 destination address (Optional)
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
-        # Overwrite standard fields if desired
-        ip6_dst = (ip_dst if ip_dst is not None else self.dst_ipv6)
-        hw_dst = (eth_dst if eth_dst is not None else self.dst_mac)
+        self.packet = _override(self._template, (scapy.IPv6, 'dst', ip_dst),
+                                (scapy.Ether, 'dst', eth_dst))
+        return self.packet
 
+    def _build(self):
+        """Builds the packet returned by generate() for its defaults."""
         # Create IPv6 layer
-        base = scapy.IPv6(dst=ip6_dst, src=self.src_ipv6)
+        base = scapy.IPv6(dst=self.dst_ipv6, src=self.src_ipv6)
         echo_request = scapy.ICMPv6EchoRequest(data=PING6_DATA)
 
         ip6 = base / echo_request
 
         # Create Ethernet layer
-        ethernet = scapy.Ether(src=self.src_mac, dst=hw_dst)
+        ethernet = scapy.Ether(src=self.src_mac, dst=self.dst_mac)
 
-        self.packet = ethernet / ip6
-        return self.packet
+        return ethernet / ip6
+
+    def generate_raw(self, ip_dst=None, eth_dst=None):
+        """Same as generate(), but returns the frame as bytes."""
+        if ip_dst is None and eth_dst is None:
+            return self._raw_template
+        return self._build_raw(ip_dst, eth_dst)
+
+    def _build_raw(self, ip_dst=None, eth_dst=None):
+        """Builds the frame returned by generate_raw()."""
+        return fast_packets.build_ping6(
+            fast_packets.mac_to_bytes(self.src_mac),
+            fast_packets.mac_to_bytes(
+                eth_dst if eth_dst is not None else self.dst_mac),
+            fast_packets.ipv6_to_bytes(self.src_ipv6),
+            fast_packets.ipv6_to_bytes(
+                ip_dst if ip_dst is not None else self.dst_ipv6),
+            PING6_DATA.encode())
 
 
 class Ping4Generator(object):
@@ -636,16 +1196,20 @@ class Ping4Generator(object):
         self.packet = None
         self.dst_mac = config_params['dst_mac']
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         self.dst_ipv4 = config_params['dst_ipv4']
         if config_params['src_ipv4'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv4 = scapy.get_if_addr(interf)
+            self.src_ipv4 = _if_addr(interf)
         else:
             self.src_ipv4 = config_params['src_ipv4']
 
+        # Packet for the default arguments, see generate()
+        self._template = self._build()
+        self._raw_template = self._build_raw()
+
     def generate(self, ip_dst=None, eth_dst=None):
         """Generates a Ping4 packet (i.e., Echo Request)
 
@@ -653,22 +1217,38 @@ class Ping4Generator(object):
             ip_dst: IP destination address (Optional)
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
+        self.packet = _override(self._template, (scapy.IP, 'dst', ip_dst),
+                                (scapy.Ether, 'dst', eth_dst))
+        return self.packet
 
-        # Overwrite standard fields if desired
-        sta_ip = (ip_dst if ip_dst is not None else self.dst_ipv4)
-        sta_hw = (eth_dst if eth_dst is not None else self.dst_mac)
-
+    def _build(self):
+        """Builds the packet returned by generate() for its defaults."""
         # Create IPv6 layer
-        base = scapy.IP(src=self.src_ipv4, dst=sta_ip)
+        base = scapy.IP(src=self.src_ipv4, dst=self.dst_ipv4)
         echo_request = scapy.ICMP(type=PING4_TYPE)
 
         ip4 = base / echo_request
 
         # Create Ethernet layer
-        ethernet = scapy.Ether(src=self.src_mac, dst=sta_hw)
+        ethernet = scapy.Ether(src=self.src_mac, dst=self.dst_mac)
 
-        self.packet = ethernet / ip4
-        return self.packet
+        return ethernet / ip4
+
+    def generate_raw(self, ip_dst=None, eth_dst=None):
+        """Same as generate(), but returns the frame as bytes."""
+        if ip_dst is None and eth_dst is None:
+            return self._raw_template
+        return self._build_raw(ip_dst, eth_dst)
+
+    def _build_raw(self, ip_dst=None, eth_dst=None):
+        """Builds the frame returned by generate_raw()."""
+        return fast_packets.build_ping4(
+            fast_packets.mac_to_bytes(self.src_mac),
+            fast_packets.mac_to_bytes(
+                eth_dst if eth_dst is not None else self.dst_mac),
+            fast_packets.ipv4_to_bytes(self.src_ipv4),
+            fast_packets.ipv4_to_bytes(
+                ip_dst if ip_dst is not None else self.dst_ipv4))
 
 
 class Mdns6Generator(object):
@@ -696,16 +1276,20 @@ class Mdns6Generator(object):
         interf = config_params['interf']
         self.packet = None
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         self.src_ipv6_type = config_params['src_ipv6_type']
         if config_params['src_ipv6'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv6 = get_if_addr6(interf, self.src_ipv6_type)
+            self.src_ipv6 = _if_addr6(interf, self.src_ipv6_type)
         else:
             self.src_ipv6 = config_params['src_ipv6']
 
+        # Packet for the default arguments, see generate()
+        self._template = self._build()
+        self._raw_template = self._build_raw()
+
     def generate(self, ip_dst=None, eth_dst=None):
         """Generates a mDNS v6 packet for multicast DNS config
 
@@ -713,11 +1297,12 @@ class Mdns6Generator(object):
             ip_dst: IPv6 destination address (Optional)
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
+        self.packet = _override(self._template, (scapy.IPv6, 'dst', ip_dst),
+                                (scapy.Ether, 'dst', eth_dst))
+        return self.packet
 
-        # Overwrite standard fields if desired
-        sta_ip = (ip_dst if ip_dst is not None else MDNS_V6_IP_DST)
-        sta_hw = (eth_dst if eth_dst is not None else MDNS_V6_MAC_DST)
-
+    def _build(self):
+        """Builds the packet returned by generate() for its defaults."""
         # Create mDNS layer
         qdServer = scapy.DNSQR(qname=self.src_ipv6, qtype=MDNS_QTYPE)
         mDNS = scapy.DNS(rd=MDNS_RECURSIVE, qd=qdServer)
@@ -726,13 +1311,29 @@ class Mdns6Generator(object):
         udp = scapy.UDP(sport=MDNS_UDP_PORT, dport=MDNS_UDP_PORT)
 
         # Create IP layer
-        ip6 = scapy.IPv6(src=self.src_ipv6, dst=sta_ip)
+        ip6 = scapy.IPv6(src=self.src_ipv6, dst=MDNS_V6_IP_DST)
 
         # Create Ethernet layer
-        ethernet = scapy.Ether(src=self.src_mac, dst=sta_hw)
+        ethernet = scapy.Ether(src=self.src_mac, dst=MDNS_V6_MAC_DST)
 
-        self.packet = ethernet / ip6 / udp / mDNS
-        return self.packet
+        return ethernet / ip6 / udp / mDNS
+
+    def generate_raw(self, ip_dst=None, eth_dst=None):
+        """Same as generate(), but returns the frame as bytes."""
+        if ip_dst is None and eth_dst is None:
+            return self._raw_template
+        return self._build_raw(ip_dst, eth_dst)
+
+    def _build_raw(self, ip_dst=None, eth_dst=None):
+        """Builds the frame returned by generate_raw()."""
+        return fast_packets.build_mdns6(
+            fast_packets.mac_to_bytes(self.src_mac),
+            fast_packets.mac_to_bytes(
+                eth_dst if eth_dst is not None else MDNS_V6_MAC_DST),
+            fast_packets.ipv6_to_bytes(self.src_ipv6),
+            fast_packets.ipv6_to_bytes(
+                ip_dst if ip_dst is not None else MDNS_V6_IP_DST),
+            MDNS_UDP_PORT, self.src_ipv6)
 
 
 class Mdns4Generator(object):
@@ -759,15 +1360,19 @@ class Mdns4Generator(object):
         interf = config_params['interf']
         self.packet = None
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
 
         if config_params['src_ipv4'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_ipv4 = scapy.get_if_addr(interf)
+            self.src_ipv4 = _if_addr(interf)
         else:
             self.src_ipv4 = config_params['src_ipv4']
 
+        # Packet for the default arguments, see generate()
+        self._template = self._build()
+        self._raw_template = self._build_raw()
+
     def generate(self, ip_dst=None, eth_dst=None):
         """Generates a mDNS v4 packet for multicast DNS config
 
@@ -775,11 +1380,12 @@ class Mdns4Generator(object):
             ip_dst: IP destination address (Optional)
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
+        self.packet = _override(self._template, (scapy.IP, 'dst', ip_dst),
+                                (scapy.Ether, 'dst', eth_dst))
+        return self.packet
 
-        # Overwrite standard fields if desired
-        sta_ip = (ip_dst if ip_dst is not None else MDNS_V4_IP_DST)
-        sta_hw = (eth_dst if eth_dst is not None else MDNS_V4_MAC_DST)
-
+    def _build(self):
+        """Builds the packet returned by generate() for its defaults."""
         # Create mDNS layer
         qdServer = scapy.DNSQR(qname=self.src_ipv4, qtype=MDNS_QTYPE)
         mDNS = scapy.DNS(rd=MDNS_RECURSIVE, qd=qdServer)
@@ -788,13 +1394,29 @@ class Mdns4Generator(object):
         udp = scapy.UDP(sport=MDNS_UDP_PORT, dport=MDNS_UDP_PORT)
 
         # Create IP layer
-        ip4 = scapy.IP(src=self.src_ipv4, dst=sta_ip, ttl=255)
+        ip4 = scapy.IP(src=self.src_ipv4, dst=MDNS_V4_IP_DST, ttl=255)
 
         # Create Ethernet layer
-        ethernet = scapy.Ether(src=self.src_mac, dst=sta_hw)
+        ethernet = scapy.Ether(src=self.src_mac, dst=MDNS_V4_MAC_DST)
 
-        self.packet = ethernet / ip4 / udp / mDNS
-        return self.packet
+        return ethernet / ip4 / udp / mDNS
+
+    def generate_raw(self, ip_dst=None, eth_dst=None):
+        """Same as generate(), but returns the frame as bytes."""
+        if ip_dst is None and eth_dst is None:
+            return self._raw_template
+        return self._build_raw(ip_dst, eth_dst)
+
+    def _build_raw(self, ip_dst=None, eth_dst=None):
+        """Builds the frame returned by generate_raw()."""
+        return fast_packets.build_mdns4(
+            fast_packets.mac_to_bytes(self.src_mac),
+            fast_packets.mac_to_bytes(
+                eth_dst if eth_dst is not None else MDNS_V4_MAC_DST),
+            fast_packets.ipv4_to_bytes(self.src_ipv4),
+            fast_packets.ipv4_to_bytes(
+                ip_dst if ip_dst is not None else MDNS_V4_IP_DST),
+            MDNS_UDP_PORT, self.src_ipv4, MDNS_TTL)
 
 
 class Dot3Generator(object):
@@ -822,9 +1444,15 @@ class Dot3Generator(object):
         self.packet = None
         self.dst_mac = config_params['dst_mac']
         if config_params['src_mac'] == GET_FROM_LOCAL_INTERFACE:
-            self.src_mac = scapy.get_if_hwaddr(interf)
+            self.src_mac = _if_hwaddr(interf)
         else:
             self.src_mac = config_params['src_mac']
+        self._src_mac_bytes = fast_packets.mac_to_bytes(self.src_mac)
+
+        # Frames are built on first use and keyed by their header fields,
+        # see _get_template() and _get_raw_template()
+        self._templates = {}
+        self._raw_templates = {}
 
     def _build_ether(self, eth_dst=None):
         """Creates the basic frame for 802.3
@@ -846,9 +1474,8 @@ class Dot3Generator(object):
             frame: Ethernet (layer 2) to be padded
         """
         frame.len = PAD_LEN_BYTES
-        pad = scapy.Padding()
-        pad.load = '\x00' * PAD_LEN_BYTES
-        return frame / pad
+        # '/' copies its operands, so the shared payload is never mutated
+        return frame / scapy.Padding(load=_PAD_PAYLOAD)
 
     def generate(self, eth_dst=None):
         """Generates the basic 802.3 frame and adds padding
@@ -856,12 +1483,13 @@ class Dot3Generator(object):
         Args:
             eth_dst: Ethernet (layer 2) destination address (Optional)
         """
-        # Create 802.3 Base
-        ethernet = self._build_ether(eth_dst)
-
-        self.packet = self._pad_frame(ethernet)
+        self.packet = self._get_template(eth_dst)
         return self.packet
 
+    def generate_raw(self, eth_dst=None):
+        """Same as generate(), but returns the frame as bytes."""
+        return self._get_raw_template(eth_dst)
+
     def generate_llc(self, eth_dst=None, dsap=2, ssap=3, ctrl=LLC_XID_CONTROL):
         """Generates the 802.3 frame with LLC and adds padding
 
@@ -871,16 +1499,17 @@ class Dot3Generator(object):
             ssap: Source Service Access Point (Optional)
             ctrl: Control (Optional)
         """
-        # Create 802.3 Base
-        ethernet = self._build_ether(eth_dst)
-
-        # Create LLC layer
-        llc = scapy.LLC(dsap=dsap, ssap=ssap, ctrl=ctrl)
-
-        # Append and create packet
-        self.packet = self._pad_frame(ethernet / llc)
+        self.packet = self._get_template(eth_dst, (dsap, ssap, ctrl))
         return self.packet
 
+    def generate_llc_raw(self,
+                         eth_dst=None,
+                         dsap=2,
+                         ssap=3,
+                         ctrl=LLC_XID_CONTROL):
+        """Same as generate_llc(), but returns the frame as bytes."""
+        return self._get_raw_template(eth_dst, (dsap, ssap, ctrl))
+
     def generate_snap(self,
                       eth_dst=None,
                       dsap=SNAP_DSAP,
@@ -898,18 +1527,149 @@ class Dot3Generator(object):
             oid: Protocol Id or Org Code (Optional)
             code: EtherType (Optional)
         """
-        # Create 802.3 Base
-        ethernet = self._build_ether(eth_dst)
+        self.packet = self._get_template(eth_dst, (dsap, ssap, ctrl),
+                                         (oui, code))
+        return self.packet
 
-        # Create 802.2 LLC header
-        llc = scapy.LLC(dsap=dsap, ssap=ssap, ctrl=ctrl)
+    def generate_snap_raw(self,
+                          eth_dst=None,
+                          dsap=SNAP_DSAP,
+                          ssap=SNAP_SSAP,
+                          ctrl=SNAP_CTRL,
+                          oui=SNAP_OUI,
+                          code=ETH_TYPE_IP):
+        """Same as generate_snap(), but returns the frame as bytes."""
+        return self._get_raw_template(eth_dst, (dsap, ssap, ctrl),
+                                      (oui, code))
 
-        # Create 802.3 SNAP header
-        snap = scapy.SNAP(OUI=oui, code=code)
+    def _get_template(self, eth_dst, llc=None, snap=None):
+        """Returns the padded frame for these headers.
 
-        # Append and create packet
-        self.packet = self._pad_frame(ethernet / llc / snap)
-        return self.packet
+        Args:
+            eth_dst: Ethernet (layer 2) destination address, or None
+            llc: (dsap, ssap, ctrl) of the 802.2 LLC header, or None
+            snap: (oui, code) of the SNAP header, or None
+
+        Returns:
+            The packet, built once per set of arguments.
+        """
+        key = (eth_dst, llc, snap)
+        if key not in self._templates:
+            # Create 802.3 Base
+            frame = self._build_ether(eth_dst)
+            if llc is not None:
+                dsap, ssap, ctrl = llc
+                # Create 802.2 LLC header
+                frame = frame / scapy.LLC(dsap=dsap, ssap=ssap, ctrl=ctrl)
+            if snap is not None:
+                oui, code = snap
+                # Create 802.3 SNAP header
+                frame = frame / scapy.SNAP(OUI=oui, code=code)
+            self._templates[key] = self._pad_frame(frame)
+        return self._templates[key]
+
+    def _get_raw_template(self, eth_dst, llc=None, snap=None):
+        """Same as _get_template(), but returns the frame as bytes."""
+        key = (eth_dst, llc, snap)
+        if key not in self._raw_templates:
+            self._raw_templates[key] = fast_packets.build_dot3(
+                self._src_mac_bytes,
+                fast_packets.mac_to_bytes(
+                    eth_dst if eth_dst is not None else self.dst_mac),
+                PAD_LEN_BYTES, llc, snap, _PAD_PAYLOAD)
+        return self._raw_templates[key]
+
+
+def _is_reply(packet, frame):
+    """Returns whether frame, dissected like packet, answers it."""
+    return packet.__class__(frame).answers(packet)
+
+
+def make_generator(generate_raw, *args, **kwargs):
+    """Returns a function that returns the frame of generate_raw(...).
+
+    The frame is built once, here, so a send loop that asks for a frame on
+    every iteration pays for a single call and no argument checks.
+
+    Args:
+        generate_raw: generate*_raw() method of a packet generator, e.g.
+            Ping4Generator(**config).generate_raw
+        args, kwargs: arguments passed to generate_raw
+
+    Returns:
+        A function taking no arguments that returns the frame as bytes.
+    """
+    frame = generate_raw(*args, **kwargs)
+
+    def generate():
+        return frame
+
+    return generate
+
+
+def _log_exception(log, msg, *args):
+    """Logs msg with the current traceback if log has ERROR enabled.
+
+    Checking first skips formatting the traceback when the logger is
+    silenced, which matters when a broken socket fails every send.
+    """
+    if log.isEnabledFor(logging.ERROR):
+        log.exception(msg, *args)
+
+
+def _override(template, *fields):
+    """Returns a packet template with some of its fields changed.
+
+    Args:
+        template: packet built for the default arguments of a generator
+        fields: (layer, field name, value) tuples; None values are skipped
+
+    Returns:
+        template itself if every value is None, otherwise a copy of it with
+        the fields set.
+    """
+    changes = [change for change in fields if change[2] is not None]
+    if not changes:
+        return template
+    packet = template.copy()
+    for layer, name, value in changes:
+        setattr(packet[layer], name, value)
+    return packet
+
+
+def _solicited_node_addrs(ipv6):
+    """Returns the solicited-node multicast IPv6 and MAC addresses of ipv6.
+
+    Args:
+        ipv6: IPv6 address in human readable form
+
+    Returns:
+        Tuple of (multicast IPv6 address, multicast MAC address)
+    """
+    nnode_mcast = scapy.in6_getnsma(socket.inet_pton(socket.AF_INET6, ipv6))
+    return (socket.inet_ntop(socket.AF_INET6, nnode_mcast),
+            scapy.in6_getnsmac(nnode_mcast))
+
+
+# Local addresses are looked up when a generator is created with 'get_local'.
+# They are cached so that creating many generators for an interface only reads
+# them once; call cache_clear() on these if an interface's addresses change.
+@functools.lru_cache(maxsize=None)
+def _if_hwaddr(intf):
+    """Returns the MAC address of a local interface."""
+    return scapy.get_if_hwaddr(intf)
+
+
+@functools.lru_cache(maxsize=None)
+def _if_addr(intf):
+    """Returns the IPv4 address of a local interface."""
+    return scapy.get_if_addr(intf)
+
+
+@functools.lru_cache(maxsize=None)
+def _if_addr6(intf, address_type):
+    """Returns the IPv6 address of a local interface, see get_if_addr6()."""
+    return get_if_addr6(intf, address_type)
 
 
 def get_if_addr6(intf, address_type):
@@ -927,9 +1687,43 @@ def get_if_addr6(intf, address_type):
     Returns:
         Ipv6 address of the specified interface in human readable format
     """
-    for if_list in scapy.in6_getifaddr():
-        if if_list[2] == intf and if_list[1] == address_type:
-            return if_list[0]
-
-    return None
-
+    global _if_addr6_index, _if_addr6_index_time
+    now = time.monotonic()
+    if (_if_addr6_index_time is None
+            or now - _if_addr6_index_time > IF_ADDR6_CACHE_TTL):
+        index = {}
+        for addr, scope, name in scapy.in6_getifaddr():
+            # Keep the first address listed, as the lookup used to
+            index.setdefault((name, scope), addr)
+        _if_addr6_index = index
+        _if_addr6_index_time = now
+    return _if_addr6_index.get((intf, address_type))
+
+
+def _warm_up_layers():
+    """Builds and serializes each layer stack the generators use once.
+
+    scapy.all already imports and registers every layer, but a layer's field
+    caches are only filled the first time it is instantiated and built.
+    Doing that as soon as scapy is imported keeps the cost out of the first
+    generator and send. Addresses are given explicitly so that scapy
+    doesn't try (and warn about failing) to resolve them.
+    """
+    ether = functools.partial(scapy.Ether, src=WARM_UP_MAC, dst=MAC_BROADCAST)
+    packets = (
+        ether() / scapy.ARP(),
+        ether() / scapy.IP() / scapy.UDP() /
+        scapy.BOOTP(options=scapy.dhcpmagic) / scapy.DHCP(options=['end']),
+        ether() / scapy.IPv6() / scapy.ICMPv6ND_NS() /
+        scapy.ICMPv6NDOptSrcLLAddr(),
+        ether() / scapy.IPv6() / scapy.ICMPv6ND_RA() /
+        scapy.ICMPv6NDOptPrefixInfo() / scapy.ICMPv6NDOptRDNSS(),
+        ether() / scapy.IPv6() / scapy.ICMPv6EchoRequest(),
+        ether() / scapy.IP() / scapy.ICMP(),
+        ether() / scapy.IP() / scapy.UDP() /
+        scapy.DNS(qd=scapy.DNSQR()),
+        scapy.Dot3(src=WARM_UP_MAC, dst=MAC_BROADCAST) / scapy.LLC() /
+        scapy.SNAP(),
+    )
+    for packet in packets:
+        bytes(packet)
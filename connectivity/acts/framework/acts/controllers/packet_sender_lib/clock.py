@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+"""Absolute-deadline sleeps on CLOCK_MONOTONIC.
+
+Sleeping until a deadline rather than for an interval keeps periodic loops
+from drifting by the time spent between sleeps. On Linux this uses
+clock_nanosleep(2) with TIMER_ABSTIME through ctypes; elsewhere it falls
+back to time.sleep().
+"""
+import ctypes
+import ctypes.util
+import errno
+import sys
+import time
+
+TIMER_ABSTIME = 1
+NSEC_PER_SEC = 1000000000
+
+
+class _TimeSpec(ctypes.Structure):
+    _fields_ = [
+        ('tv_sec', ctypes.c_long),
+        ('tv_nsec', ctypes.c_long),
+    ]
+
+
+def _load_clock_nanosleep():
+    """Returns a typed clock_nanosleep, or None if it is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+        clock_nanosleep = libc.clock_nanosleep
+    except (OSError, AttributeError):
+        return None
+    clock_nanosleep.argtypes = [
+        ctypes.c_int, ctypes.c_int,
+        ctypes.POINTER(_TimeSpec),
+        ctypes.POINTER(_TimeSpec)
+    ]
+    clock_nanosleep.restype = ctypes.c_int
+    return clock_nanosleep
+
+
+_clock_nanosleep = _load_clock_nanosleep()
+
+
+def _monotonic_ns():
+    """time.monotonic_ns() for Python versions older than 3.7."""
+    return int(time.monotonic() * NSEC_PER_SEC)
+
+
+# Current CLOCK_MONOTONIC time (ns)
+monotonic_ns = getattr(time, 'monotonic_ns', None) or _monotonic_ns
+
+
+def sleep_until_ns(deadline):
+    """Sleeps until monotonic_ns() reaches deadline.
+
+    Returns immediately if the deadline has already passed.
+
+    Args:
+        deadline: CLOCK_MONOTONIC time (ns) to sleep until
+    """
+    if _clock_nanosleep is None:
+        remaining = deadline - monotonic_ns()
+        if remaining > 0:
+            time.sleep(remaining / NSEC_PER_SEC)
+        return
+    request = _TimeSpec(*divmod(deadline, NSEC_PER_SEC))
+    # The deadline is absolute, so retrying after a signal doesn't oversleep
+    while _clock_nanosleep(time.CLOCK_MONOTONIC, TIMER_ABSTIME,
+                           ctypes.byref(request), None) == errno.EINTR:
+        pass
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+"""Builders for the fixed-layout frames sent by packet_sender.
+
+These produce the same bytes as the equivalent scapy packets, using the same
+field defaults (e.g., IPv4 id 1 and TTL 64, IPv6 hop limit 64 outside of
+Neighbor Discovery), without going through scapy's layer machinery.
+Addresses are passed already packed: MACs as 6 bytes, IPv4 addresses as 4
+bytes and IPv6 addresses as 16 bytes.
+"""
+import functools
+import socket
+import struct
+import sys
+
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_IPV6 = 0x86dd
+IPPROTO_ICMP = 1
+IPPROTO_UDP = 17
+IPPROTO_ICMPV6 = 58
+ICMP_ECHO_REQUEST = 8
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ND_NS = 135
+ND_OPT_SRC_LLADDR = 1
+IPV4_DEFAULT_ID = 1
+DEFAULT_TTL = 64
+# Neighbor Discovery messages must be sent with a hop limit of 255 (RFC 4861)
+ND_HOP_LIMIT = 255
+DNS_TYPE_PTR = 12
+DNS_CLASS_IN = 1
+DNS_FLAG_RD = 0x0100
+
+_ETHER = struct.Struct('!6s6sH')
+_LLC = struct.Struct('!BBB')
+_SNAP = struct.Struct('!3sH')
+_ARP = struct.Struct('!HHBBH6s4s6s4s')
+_IPV4 = struct.Struct('!BBHHHBBH4s4s')
+_IPV6 = struct.Struct('!IHBB16s16s')
+_IPV6_PSEUDO = struct.Struct('!16s16sI3xB')
+_IPV4_PSEUDO = struct.Struct('!4s4sxBH')
+_UDP = struct.Struct('!HHHH')
+_ICMP = struct.Struct('!BBHHH')
+_ICMPV6_NS = struct.Struct('!BBHI16sBB6s')
+_BOOTP = struct.Struct('!BBBBIHH4s4s4s4s16s64s128s')
+_DNS = struct.Struct('!HHHHHH')
+_DNS_QUESTION = struct.Struct('!HH')
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+# BOOTP client address of a DHCP offer (0.0.0.0)
+_NO_CIADDR = bytes(4)
+
+
+def checksum(data):
+    """Returns the Internet checksum (RFC 1071) of data.
+
+    The data is summed as native-endian 32-bit words and folded down to 16
+    bits afterwards; the one's complement sum doesn't depend on byte order
+    other than for a final swap (RFC 1071, section 2.B).
+    """
+    if len(data) % 4:
+        data = bytes(data) + bytes(-len(data) % 4)
+    total = sum(memoryview(data).cast('I'))
+    # Frames are well under 2**16 words, so total fits in 48 bits
+    total = (total & 0xffffffff) + (total >> 32)
+    total = (total & 0xffff) + (total >> 16)
+    total = (total & 0xffff) + (total >> 16)
+    total = (total & 0xffff) + (total >> 16)
+    if _LITTLE_ENDIAN:
+        total = ((total & 0xff) << 8) | (total >> 8)
+    return ~total & 0xffff
+
+
+@functools.lru_cache(maxsize=64)
+def mac_to_bytes(mac):
+    """Packs a MAC address in 'aa:bb:cc:dd:ee:ff' notation.
+
+    Generators pack the same few addresses for every frame, so results are
+    cached.
+    """
+    return bytes.fromhex(mac.replace(':', ''))
+
+
+def ipv4_to_bytes(address):
+    """Packs an IPv4 address in dotted notation."""
+    return socket.inet_pton(socket.AF_INET, address)
+
+
+def ipv6_to_bytes(address):
+    """Packs an IPv6 address."""
+    return socket.inet_pton(socket.AF_INET6, address)
+
+
+def _ipv4(src, dst, proto, payload, ttl=DEFAULT_TTL):
+    """Returns an IPv4 header followed by payload."""
+    length = _IPV4.size + len(payload)
+    header = _IPV4.pack(0x45, 0, length, IPV4_DEFAULT_ID, 0, ttl, proto, 0,
+                        src, dst)
+    return (header[:10] + struct.pack('!H', checksum(header)) + header[12:] +
+            payload)
+
+
+def _ipv6(src, dst, next_header, payload, hop_limit=DEFAULT_TTL):
+    """Returns an IPv6 header followed by payload."""
+    return _IPV6.pack(6 << 28, len(payload), next_header, hop_limit, src,
+                      dst) + payload
+
+
+def _udp4(src, dst, sport, dport, data):
+    """Returns a UDP datagram with its IPv4 pseudo-header checksum."""
+    length = _UDP.size + len(data)
+    datagram = _UDP.pack(sport, dport, length, 0) + data
+    csum = checksum(
+        _IPV4_PSEUDO.pack(src, dst, IPPROTO_UDP, length) + datagram)
+    return datagram[:6] + struct.pack('!H', csum or 0xffff) + datagram[8:]
+
+
+def _with_ipv6_checksum(src, dst, next_header, message, offset):
+    """Fills in the checksum at offset of an upper-layer IPv6 message."""
+    csum = checksum(
+        _IPV6_PSEUDO.pack(src, dst, len(message), next_header) + message)
+    if next_header == IPPROTO_UDP:
+        csum = csum or 0xffff
+    return message[:offset] + struct.pack('!H', csum) + message[offset + 2:]
+
+
+def _dns_ptr_query(qname):
+    """Returns a recursive DNS query for the PTR record of qname."""
+    labels = b''.join(
+        bytes((len(label), )) + label
+        for label in qname.encode().split(b'.') if label)
+    return (_DNS.pack(0, DNS_FLAG_RD, 1, 0, 0, 0) + labels + b'\x00' +
+            _DNS_QUESTION.pack(DNS_TYPE_PTR, DNS_CLASS_IN))
+
+
+def build_arp(eth_src, eth_dst, hwsrc, psrc, hwdst, pdst, op):
+    """Returns an Ethernet ARP frame.
+
+    Args:
+        op: ARP opcode (1 for who-has, 2 for is-at)
+    """
+    return (_ETHER.pack(eth_dst, eth_src, ETH_P_ARP) +
+            _ARP.pack(1, ETH_P_IP, 6, 4, op, hwsrc, psrc, hwdst, pdst))
+
+
+def build_ping4(eth_src, eth_dst, ip_src, ip_dst):
+    """Returns an Ethernet frame with an ICMP echo request."""
+    icmp = _ICMP.pack(ICMP_ECHO_REQUEST, 0, 0, 0, 0)
+    icmp = icmp[:2] + struct.pack('!H', checksum(icmp)) + icmp[4:]
+    return (_ETHER.pack(eth_dst, eth_src, ETH_P_IP) +
+            _ipv4(ip_src, ip_dst, IPPROTO_ICMP, icmp))
+
+
+def build_ping6(eth_src, eth_dst, ip_src, ip_dst, data):
+    """Returns an Ethernet frame with an ICMPv6 echo request.
+
+    Args:
+        data: bytes carried by the echo request
+    """
+    icmp = _ICMP.pack(ICMPV6_ECHO_REQUEST, 0, 0, 0, 0) + data
+    icmp = _with_ipv6_checksum(ip_src, ip_dst, IPPROTO_ICMPV6, icmp, 2)
+    return (_ETHER.pack(eth_dst, eth_src, ETH_P_IPV6) +
+            _ipv6(ip_src, ip_dst, IPPROTO_ICMPV6, icmp))
+
+
+def build_ns(eth_src, eth_dst, ip_src, ip_dst, target):
+    """Returns an Ethernet frame with a Neighbor Solicitation.
+
+    The solicitation carries a source link-layer address option set to
+    eth_src.
+    """
+    icmp = _ICMPV6_NS.pack(ICMPV6_ND_NS, 0, 0, 0, target, ND_OPT_SRC_LLADDR,
+                           1, eth_src)
+    icmp = _with_ipv6_checksum(ip_src, ip_dst, IPPROTO_ICMPV6, icmp, 2)
+    return (_ETHER.pack(eth_dst, eth_src, ETH_P_IPV6) +
+            _ipv6(ip_src, ip_dst, IPPROTO_ICMPV6, icmp, ND_HOP_LIMIT))
+
+
+def build_dhcp_offer(eth_src, eth_dst, ip_src, ip_dst, sport, dport, op, xid,
+                     yiaddr, siaddr, giaddr, chaddr, options):
+    """Returns an Ethernet frame with a BOOTP/DHCP message.
+
+    Args:
+        chaddr: client hardware address, padded to 16 bytes
+        options: encoded options, including the DHCP magic cookie
+    """
+    bootp = _BOOTP.pack(op, 1, 6, 0, xid, 0, 0, _NO_CIADDR, yiaddr, siaddr,
+                        giaddr, chaddr, b'', b'') + options
+    return (_ETHER.pack(eth_dst, eth_src, ETH_P_IP) +
+            _ipv4(ip_src, ip_dst, IPPROTO_UDP,
+                  _udp4(ip_src, ip_dst, sport, dport, bootp)))
+
+
+def build_mdns4(eth_src, eth_dst, ip_src, ip_dst, port, qname, ttl):
+    """Returns an Ethernet frame with an mDNS PTR query over IPv4."""
+    return (_ETHER.pack(eth_dst, eth_src, ETH_P_IP) + _ipv4(
+        ip_src, ip_dst, IPPROTO_UDP,
+        _udp4(ip_src, ip_dst, port, port, _dns_ptr_query(qname)), ttl))
+
+
+def build_mdns6(eth_src, eth_dst, ip_src, ip_dst, port, qname):
+    """Returns an Ethernet frame with an mDNS PTR query over IPv6."""
+    dns = _dns_ptr_query(qname)
+    udp = _UDP.pack(port, port, _UDP.size + len(dns), 0) + dns
+    udp = _with_ipv6_checksum(ip_src, ip_dst, IPPROTO_UDP, udp, 6)
+    return (_ETHER.pack(eth_dst, eth_src, ETH_P_IPV6) +
+            _ipv6(ip_src, ip_dst, IPPROTO_UDP, udp))
+
+
+def build_dot3(eth_src, eth_dst, length, llc=None, snap=None, padding=b''):
+    """Returns an 802.3 frame with optional LLC and SNAP headers.
+
+    Args:
+        length: value of the 802.3 length field
+        llc: (dsap, ssap, ctrl) of the 802.2 LLC header, or None
+        snap: (oui, code) of the SNAP header, or None; oui is an integer
+        padding: bytes appended after the headers
+    """
+    frame = _ETHER.pack(eth_dst, eth_src, length)
+    if llc is not None:
+        frame += _LLC.pack(*llc)
+    if snap is not None:
+        oui, code = snap
+        frame += _SNAP.pack(oui.to_bytes(3, 'big'), code)
+    return frame + padding
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+"""Helpers for sending pre-serialized frames over Linux raw packet sockets.
+
+sendmmsg(2) is not exposed by the socket module, so it is called through
+ctypes. On platforms without AF_PACKET or sendmmsg, is_supported() returns
+False and callers are expected to fall back to scapy.
+
+MSG_ZEROCOPY is deliberately not used: Linux only implements SO_ZEROCOPY for
+TCP, UDP and RDS sockets and rejects it on packet sockets with EOPNOTSUPP.
+Each frame is therefore copied into an skb once per send.
+"""
+import array
+import ctypes
+import ctypes.util
+import itertools
+import mmap
+import os
+import select
+import socket
+import struct
+import sys
+import time
+
+# Receive nothing; these sockets are only used to transmit.
+ETH_P_NONE = 0
+# Maximum number of frames handed to the kernel in one sendmmsg call.
+MAX_BATCH = 64
+# Receive every protocol; open_rx_socket() narrows this down with a filter.
+ETH_P_ALL = 0x0003
+# From linux/asm-generic/socket.h; SCM_TXTIME shares the option's value.
+SO_ATTACH_FILTER = 26
+SO_TXTIME = 61
+SCM_TXTIME = SO_TXTIME
+# Classic BPF opcodes, from linux/filter.h
+BPF_LD_H_ABS = 0x28
+BPF_LD_W_ABS = 0x20
+BPF_JEQ_K = 0x15
+BPF_RET_K = 0x06
+# Largest frame accepted by an RX filter and read by wait_for_frame()
+MAX_FRAME_LEN = 65535
+# Ethernet type/length values below this are 802.3 lengths
+ETH_MIN_TYPE = 0x0600
+# From linux/if_packet.h
+SOL_PACKET = 263
+PACKET_VERSION = 10
+PACKET_TX_RING = 13
+TPACKET_V2 = 1
+TP_STATUS_SEND_REQUEST = 1
+# Offset of the frame data in a TPACKET_V2 TX ring slot: the aligned
+# tpacket2_hdr, as the ring socket doesn't use PACKET_TX_HAS_OFF.
+TPACKET2_DATA_OFFSET = 32
+# Number of slots in a TxRing
+TX_RING_FRAMES = 128
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IoVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_hdr', _MsgHdr),
+        ('msg_len', ctypes.c_uint),
+    ]
+
+
+class _SockFProg(ctypes.Structure):
+    _fields_ = [
+        ('len', ctypes.c_ushort),
+        ('filter', ctypes.c_void_p),
+    ]
+
+
+class _TxTimeCmsg(ctypes.Structure):
+    """A cmsghdr carrying a single SCM_TXTIME timestamp (ns)."""
+    _fields_ = [
+        ('cmsg_len', ctypes.c_size_t),
+        ('cmsg_level', ctypes.c_int),
+        ('cmsg_type', ctypes.c_int),
+        ('txtime', ctypes.c_uint64),
+    ]
+
+
+def _load_libc():
+    """Returns libc with a typed sendmmsg, or None if it is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int
+    ]
+    sendmmsg.restype = ctypes.c_int
+    return libc
+
+
+_libc = _load_libc()
+
+
+def is_supported():
+    """Returns True if raw sockets and sendmmsg are usable on this host."""
+    return _libc is not None and hasattr(socket, 'AF_PACKET')
+
+
+def open_socket(interface):
+    """Opens a transmit-only raw packet socket bound to an interface.
+
+    Args:
+        interface: network interface name (e.g., 'eth0')
+
+    Returns:
+        A socket.socket that sends whole Ethernet frames on the interface.
+    """
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, ETH_P_NONE)
+    try:
+        sock.bind((interface, ETH_P_NONE))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def open_rx_socket(interface, dst_mac, ethertype=None):
+    """Opens a raw packet socket receiving frames sent to a MAC address.
+
+    Frames sent to the broadcast address are accepted too, since many
+    replies (e.g., DHCP offers) are broadcast. The socket only starts
+    receiving once bound, after a classic BPF filter is attached, so the
+    kernel drops every other frame without waking the caller and nothing
+    unrelated gets queued.
+
+    Args:
+        interface: network interface name (e.g., 'eth0')
+        dst_mac: destination MAC address to accept besides broadcast, as 6
+            bytes
+        ethertype: Ethernet type to accept, or None to accept any
+
+    Returns:
+        A socket.socket to use with wait_for_frame().
+    """
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, ETH_P_NONE)
+    try:
+        program = _dst_filter(dst_mac, ethertype)
+        code = ctypes.create_string_buffer(program)
+        fprog = _SockFProg(len(program) // 8, ctypes.addressof(code))
+        sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, bytes(fprog))
+        sock.bind((interface, ETH_P_ALL))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _dst_filter(dst_mac, ethertype=None):
+    """Returns a BPF program accepting frames to dst_mac or broadcast.
+
+    If ethertype is given, frames of other Ethernet types are rejected.
+    """
+    hi, lo = struct.unpack('!IH', dst_mac)
+    insns = []
+    if ethertype is not None:
+        insns += [(BPF_LD_H_ABS, 0, 0, 12), (BPF_JEQ_K, 0, 9, ethertype)]
+    # Jump offsets count from the next instruction
+    insns += [
+        (BPF_LD_W_ABS, 0, 0, 0),
+        (BPF_JEQ_K, 0, 2, hi),  # else check for broadcast
+        (BPF_LD_H_ABS, 0, 0, 4),
+        (BPF_JEQ_K, 4, 0, lo),  # accept, else check for broadcast
+        (BPF_LD_W_ABS, 0, 0, 0),
+        (BPF_JEQ_K, 0, 3, 0xffffffff),
+        (BPF_LD_H_ABS, 0, 0, 4),
+        (BPF_JEQ_K, 0, 1, 0xffff),
+        (BPF_RET_K, 0, 0, MAX_FRAME_LEN),
+        (BPF_RET_K, 0, 0, 0),
+    ]
+    return b''.join(struct.pack('HBBI', *insn) for insn in insns)
+
+
+def drain(sock):
+    """Discards every frame already queued on a socket."""
+    while True:
+        try:
+            sock.recv(MAX_FRAME_LEN, socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return
+
+
+def wait_for_frame(sock, timeout, match=None):
+    """Waits for the next frame received by a socket.
+
+    Frames sent from this host, which packet sockets also see, are skipped.
+
+    Args:
+        sock: a socket returned by open_rx_socket()
+        timeout: maximum time to wait (s)
+        match: function taking a frame and returning whether to accept it,
+            or None to accept any frame
+
+    Returns:
+        The frame as bytes, or None if none arrived before the timeout.
+    """
+    poller = select.poll()
+    poller.register(sock, select.POLLIN)
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not poller.poll(remaining * 1000):
+            return None
+        frame, address = sock.recvfrom(MAX_FRAME_LEN)
+        if address[2] == socket.PACKET_OUTGOING:
+            continue
+        if match is None or match(frame):
+            return frame
+
+
+def enable_txtime(sock):
+    """Enables SO_TXTIME on a socket, using CLOCK_MONOTONIC timestamps.
+
+    Frames sent with a transmit time are held by the qdisc until that time.
+    Only the fq and etf qdiscs honor it; others send the frames immediately.
+
+    Args:
+        sock: a socket returned by open_socket()
+
+    Returns:
+        True if the kernel accepted the option, False otherwise.
+    """
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TXTIME,
+                        struct.pack('iI', time.CLOCK_MONOTONIC, 0))
+    except OSError:
+        return False
+    return True
+
+
+class FrameBatch(object):
+    """sendmmsg descriptors for up to MAX_BATCH frames, reusable across sends.
+
+    For small frames, building the ctypes descriptor arrays costs more than
+    the sendmmsg call itself, so loops that keep sending the same frames
+    should build a FrameBatch once and call send() repeatedly.
+    """
+
+    def __init__(self, frames, txtime=False):
+        """Builds the descriptors.
+
+        Args:
+            frames: between 1 and MAX_BATCH bytes objects, each a full frame
+            txtime: whether to reserve a SCM_TXTIME control message per frame,
+                see set_txtimes()
+        """
+        # The descriptors point into these buffers, so keep them alive
+        self._frames = list(frames)
+        count = len(self._frames)
+        if not 0 < count <= MAX_BATCH:
+            raise ValueError('A batch holds 1 to %d frames, got %d.' %
+                             (MAX_BATCH, count))
+        self._iovecs = (_IoVec * count)()
+        self._msgs = (_MMsgHdr * count)()
+        self._cmsgs = (_TxTimeCmsg * count)() if txtime else None
+        for i, frame in enumerate(self._frames):
+            self._iovecs[i].iov_base = ctypes.cast(ctypes.c_char_p(frame),
+                                                   ctypes.c_void_p)
+            self._iovecs[i].iov_len = len(frame)
+            self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+            self._msgs[i].msg_hdr.msg_iovlen = 1
+            if txtime:
+                cmsg = self._cmsgs[i]
+                cmsg.cmsg_len = ctypes.sizeof(_TxTimeCmsg)
+                cmsg.cmsg_level = socket.SOL_SOCKET
+                cmsg.cmsg_type = SCM_TXTIME
+                self._msgs[i].msg_hdr.msg_control = ctypes.addressof(cmsg)
+                self._msgs[i].msg_hdr.msg_controllen = ctypes.sizeof(
+                    _TxTimeCmsg)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def set_txtimes(self, txtimes):
+        """Sets the CLOCK_MONOTONIC transmit time (ns) of each frame."""
+        for cmsg, txtime in zip(self._cmsgs, txtimes):
+            cmsg.txtime = txtime
+
+    def send(self, sock):
+        """Sends every frame of the batch, retrying on partial sends.
+
+        Returns:
+            The number of frames sent.
+
+        Raises:
+            OSError: if the kernel rejects the batch.
+        """
+        fd = sock.fileno()
+        count = len(self._frames)
+        offset = 0
+        while offset < count:
+            ret = _libc.sendmmsg(fd, ctypes.byref(self._msgs[offset]),
+                                 count - offset, 0)
+            if ret < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err))
+            offset += ret
+        return count
+
+
+class TxRing(object):
+    """A PACKET_TX_RING that sends the same frames over and over.
+
+    Every slot of the ring, which is shared with the kernel, is filled with
+    the frames once. Sending a pass then only marks all slots as ready and
+    makes one blocking send() call, which returns once the kernel has sent
+    them all and handed the slots back. There is no per-frame syscall or
+    copy from Python.
+    """
+
+    def __init__(self, interface, frames):
+        """Sets up the ring on a new socket.
+
+        Args:
+            interface: network interface name (e.g., 'eth0')
+            frames: list of bytes objects, each a complete frame. They are
+                repeated in order to fill the ring.
+
+        Raises:
+            OSError: if the kernel doesn't support TX rings.
+        """
+        repeats = max(1, TX_RING_FRAMES // len(frames))
+        self.frame_nr = len(frames) * repeats
+        # One slot per block; blocks must be a whole number of pages
+        self.frame_size = mmap.PAGESIZE
+        while self.frame_size < TPACKET2_DATA_OFFSET + max(map(len, frames)):
+            self.frame_size *= 2
+        self._sock = open_socket(interface)
+        try:
+            self._sock.setsockopt(SOL_PACKET, PACKET_VERSION,
+                                  struct.pack('i', TPACKET_V2))
+            self._sock.setsockopt(
+                SOL_PACKET, PACKET_TX_RING,
+                struct.pack('IIII', self.frame_size, self.frame_nr,
+                            self.frame_size, self.frame_nr))
+            self._map = mmap.mmap(self._sock.fileno(),
+                                  self.frame_size * self.frame_nr)
+        except OSError:
+            self._sock.close()
+            raise
+        for i, frame in enumerate(frames * repeats):
+            offset = i * self.frame_size
+            # tp_len and tp_snaplen follow the 32-bit tp_status
+            struct.pack_into('II', self._map, offset + 4, len(frame),
+                             len(frame))
+            data = offset + TPACKET2_DATA_OFFSET
+            self._map[data:data + len(frame)] = frame
+        # tp_status of every slot, as a strided view over the ring
+        status_stride = self.frame_size // 4
+        self._status = memoryview(self._map).cast('I')[::status_stride]
+        self._send_requests = array.array('I', [TP_STATUS_SEND_REQUEST] *
+                                          self.frame_nr)
+
+    def send(self):
+        """Sends every frame in the ring once.
+
+        Returns:
+            The number of frames sent.
+
+        Raises:
+            OSError: if the kernel rejects a frame.
+        """
+        self._status[:] = self._send_requests
+        self._sock.send(b'')
+        return self.frame_nr
+
+    def close(self):
+        """Unmaps the ring and closes its socket."""
+        self._status.release()
+        self._map.close()
+        self._sock.close()
+
+
+def send_batch(sock, frames, txtimes=None):
+    """Sends frames on a raw socket, MAX_BATCH frames per syscall.
+
+    Args:
+        sock: a socket returned by open_socket()
+        frames: an iterable of bytes objects, each a complete frame
+        txtimes: optional iterable of CLOCK_MONOTONIC transmit times (ns),
+            one per frame. Requires enable_txtime() on the socket.
+
+    Returns:
+        The number of frames sent.
+
+    Raises:
+        OSError: if the kernel rejects a batch.
+    """
+    frames = iter(frames)
+    if txtimes is not None:
+        txtimes = iter(txtimes)
+    sent = 0
+    while True:
+        chunk = list(itertools.islice(frames, MAX_BATCH))
+        if not chunk:
+            return sent
+        batch = FrameBatch(chunk, txtime=txtimes is not None)
+        if txtimes is not None:
+            batch.set_txtimes(itertools.islice(txtimes, len(chunk)))
+        sent += batch.send(sock)
+
+
+def send_repeated(sock, frame, count):
+    """Sends the same frame count times, reusing one FrameBatch.
+
+    Args:
+        sock: a socket returned by open_socket()
+        frame: bytes of a complete frame
+        count: number of times to send the frame
+
+    Returns:
+        The number of frames sent.
+
+    Raises:
+        OSError: if the kernel rejects a batch.
+    """
+    full, rest = divmod(count, MAX_BATCH)
+    if full:
+        batch = FrameBatch([frame] * MAX_BATCH)
+        for _ in range(full):
+            batch.send(sock)
+    if rest:
+        FrameBatch([frame] * rest).send(sock)
+    return count
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import unittest
+
+from acts.controllers.ap_lib import hostapd_constants
+from acts.controllers.ap_lib import hostapd_utils
+from acts.controllers.ap_lib.hostapd_security import Security
+
+
+class HostapdUtilsTest(unittest.TestCase):
+    def test_generate_random_password_lengths(self):
+        self.assertEqual(
+            len(hostapd_utils.generate_random_password()),
+            hostapd_constants.MIN_WPA_PSK_LENGTH)
+        self.assertEqual(
+            len(hostapd_utils.generate_random_password(security_mode='WEP')),
+            hostapd_constants.WEP_DEFAULT_STR_LENGTH)
+        self.assertEqual(
+            len(hostapd_utils.generate_random_password(security_mode='wpa2')),
+            hostapd_constants.MIN_WPA_PSK_LENGTH)
+        self.assertEqual(
+            len(hostapd_utils.generate_random_password(length=20, hex=True)),
+            20)
+
+    def test_verify_interface_valid(self):
+        self.assertIsNone(
+            hostapd_utils.verify_interface(
+                'wlan0', hostapd_constants.INTERFACE_2G_LIST))
+
+    def test_verify_interface_missing(self):
+        with self.assertRaises(ValueError) as context:
+            hostapd_utils.verify_interface(None,
+                                           hostapd_constants.INTERFACE_2G_LIST)
+        self.assertIn('missing', str(context.exception))
+
+    def test_verify_interface_invalid_raises_every_call(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError) as context:
+                hostapd_utils.verify_interface('bogus0', ['wlan0'])
+            self.assertIn('bogus0', str(context.exception))
+
+    def test_verify_security_mode_open(self):
+        self.assertIsNone(
+            hostapd_utils.verify_security_mode(None,
+                                               [None, hostapd_constants.WPA2]))
+        with self.assertRaises(ValueError):
+            hostapd_utils.verify_security_mode(None, [hostapd_constants.WPA2])
+
+    def test_verify_security_mode_tracks_profile_changes(self):
+        security = Security(security_mode=hostapd_constants.WPA2_STRING)
+        hostapd_utils.verify_security_mode(security,
+                                           [hostapd_constants.WPA2])
+        security.security_mode = hostapd_constants.WPA1
+        with self.assertRaises(ValueError) as context:
+            hostapd_utils.verify_security_mode(security,
+                                               [hostapd_constants.WPA2])
+        self.assertIn('Invalid Security Mode', str(context.exception))
+
+    def test_verify_cipher(self):
+        security = Security(security_mode=hostapd_constants.WPA2_STRING)
+        self.assertIsNone(
+            hostapd_utils.verify_cipher(
+                security, [hostapd_constants.WPA2_DEFAULT_CIPER]))
+        with self.assertRaises(ValueError) as context:
+            hostapd_utils.verify_cipher(security, ['bogus'])
+        self.assertIn('Invalid WPA2 Cipher', str(context.exception))
+
+    def test_verify_cipher_message_is_formatted_on_demand(self):
+        security = Security(security_mode=hostapd_constants.WPA_STRING)
+        with self.assertRaises(ValueError) as context:
+            hostapd_utils.verify_cipher(security, ['bogus'])
+        self.assertEqual(
+            str(context.exception),
+            'Invalid WPA Cipher: %s. Valid WPA Ciphers for this profile: %s' %
+            (security.wpa_cipher, ['bogus']))
+
+    def test_verify_cipher_open(self):
+        with self.assertRaises(ValueError):
+            hostapd_utils.verify_cipher(None, ['bogus'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import errno
+import time
+import unittest
+from unittest import mock
+
+from acts.controllers.packet_sender_lib import clock
+
+SLEEP_NS = 20000000
+
+
+class ClockTest(unittest.TestCase):
+    def _assert_sleeps_until_deadline(self):
+        deadline = clock.monotonic_ns() + SLEEP_NS
+        clock.sleep_until_ns(deadline)
+        self.assertGreaterEqual(clock.monotonic_ns(), deadline)
+
+    def test_sleep_until_ns(self):
+        self._assert_sleeps_until_deadline()
+
+    def test_sleep_until_ns_fallback(self):
+        with mock.patch.object(clock, '_clock_nanosleep', None):
+            self._assert_sleeps_until_deadline()
+
+    def test_sleep_until_ns_past_deadline(self):
+        start = clock.monotonic_ns()
+        clock.sleep_until_ns(start - SLEEP_NS)
+        self.assertLess(clock.monotonic_ns() - start, SLEEP_NS)
+
+    def test_monotonic_ns_fallback(self):
+        before = time.monotonic()
+        now = clock._monotonic_ns()
+        after = time.monotonic()
+        self.assertGreaterEqual(now, int(before * clock.NSEC_PER_SEC))
+        self.assertLessEqual(now, int(after * clock.NSEC_PER_SEC))
+
+    def test_sleep_until_ns_fallback_clock(self):
+        with mock.patch.multiple(clock,
+                                 _clock_nanosleep=None,
+                                 monotonic_ns=clock._monotonic_ns):
+            self._assert_sleeps_until_deadline()
+
+    def test_sleep_until_ns_retries_on_eintr(self):
+        nanosleep = mock.Mock(side_effect=[errno.EINTR, 0])
+        with mock.patch.object(clock, '_clock_nanosleep', nanosleep):
+            clock.sleep_until_ns(0)
+        self.assertEqual(nanosleep.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
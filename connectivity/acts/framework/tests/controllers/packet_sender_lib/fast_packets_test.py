@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import unittest
+
+from acts.controllers.packet_sender_lib import fast_packets
+
+# A UDP IPv4 header with its checksum field zeroed
+IPV4_HEADER = bytes.fromhex('450000730000400040110000c0a80001c0a800c7')
+
+
+class FastPacketsTest(unittest.TestCase):
+    def test_checksum(self):
+        self.assertEqual(fast_packets.checksum(IPV4_HEADER), 0xb861)
+
+    def test_checksum_rfc1071_example(self):
+        data = bytes.fromhex('0001f203f4f5f6f7')
+        self.assertEqual(fast_packets.checksum(data), ~0xddf2 & 0xffff)
+        # Not a whole number of 32-bit words
+        self.assertEqual(fast_packets.checksum(data[:6]), 0x1905)
+
+    def test_checksum_odd_length(self):
+        self.assertEqual(fast_packets.checksum(b'\x01'),
+                         fast_packets.checksum(b'\x01\x00'))
+
+    def test_checksum_verifies_to_zero(self):
+        csum = fast_packets.checksum(IPV4_HEADER)
+        header = IPV4_HEADER[:10] + csum.to_bytes(2, 'big') + IPV4_HEADER[12:]
+        self.assertEqual(fast_packets.checksum(header), 0)
+
+    def test_ping4_ip_header(self):
+        frame = fast_packets.build_ping4(
+            fast_packets.mac_to_bytes('02:00:00:00:00:01'),
+            fast_packets.mac_to_bytes('02:00:00:00:00:02'),
+            fast_packets.ipv4_to_bytes('192.168.1.1'),
+            fast_packets.ipv4_to_bytes('192.168.1.2'))
+        self.assertEqual(len(frame), 14 + 20 + 8)
+        self.assertEqual(frame[12:14], b'\x08\x00')
+        self.assertEqual(fast_packets.checksum(frame[14:34]), 0)
+        self.assertEqual(fast_packets.checksum(frame[34:]), 0)
+
+    def test_dot3_llc_snap(self):
+        frame = fast_packets.build_dot3(
+            fast_packets.mac_to_bytes('02:00:00:00:00:01'),
+            fast_packets.mac_to_bytes('02:00:00:00:00:02'),
+            128,
+            llc=(0xaa, 0xaa, 3),
+            snap=(12, 0x0800),
+            padding=bytes(4))
+        self.assertEqual(
+            frame.hex(), '020000000002020000000001'
+            '0080'
+            'aaaa03'
+            '00000c0800'
+            '00000000')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import ctypes
+import mmap
+import struct
+import unittest
+from unittest import mock
+
+from acts.controllers.packet_sender_lib import raw_socket
+
+FRAME = b'\xff' * 6 + b'\x02' * 6 + b'\x08\x00' + b'\x00' * 46
+
+
+class RawSocketTest(unittest.TestCase):
+    def setUp(self):
+        self.libc = mock.Mock()
+        patcher = mock.patch.object(raw_socket, '_libc', self.libc)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sock = mock.Mock()
+        self.sock.fileno.return_value = 3
+
+    def test_send_batch_splits_into_max_batch_chunks(self):
+        self.libc.sendmmsg.side_effect = lambda fd, msgs, count, flags: count
+
+        sent = raw_socket.send_batch(self.sock,
+                                     [FRAME] * (raw_socket.MAX_BATCH + 1))
+
+        self.assertEqual(sent, raw_socket.MAX_BATCH + 1)
+        counts = [c[0][2] for c in self.libc.sendmmsg.call_args_list]
+        self.assertEqual(counts, [raw_socket.MAX_BATCH, 1])
+
+    def test_send_batch_retries_partial_sends(self):
+        self.libc.sendmmsg.side_effect = [2, 1]
+
+        sent = raw_socket.send_batch(self.sock, [FRAME] * 3)
+
+        self.assertEqual(sent, 3)
+        counts = [c[0][2] for c in self.libc.sendmmsg.call_args_list]
+        self.assertEqual(counts, [3, 1])
+
+    @mock.patch('ctypes.get_errno', return_value=100)
+    def test_send_batch_raises_on_error(self, _):
+        self.libc.sendmmsg.return_value = -1
+
+        with self.assertRaises(OSError) as context:
+            raw_socket.send_batch(self.sock, [FRAME])
+        self.assertEqual(context.exception.errno, 100)
+
+    def test_send_batch_attaches_txtimes(self):
+        txtimes = []
+
+        def sendmmsg(fd, msgs, count, flags):
+            first = ctypes.addressof(msgs._obj)
+            for i in range(count):
+                msg = raw_socket._MMsgHdr.from_address(
+                    first + i * ctypes.sizeof(raw_socket._MMsgHdr))
+                cmsg = raw_socket._TxTimeCmsg.from_address(
+                    msg.msg_hdr.msg_control)
+                txtimes.append(cmsg.txtime)
+            return count
+
+        self.libc.sendmmsg.side_effect = sendmmsg
+
+        raw_socket.send_batch(self.sock, [FRAME] * 3, [10, 20, 30])
+
+        self.assertEqual(txtimes, [10, 20, 30])
+
+    def test_send_batch_empty(self):
+        self.assertEqual(raw_socket.send_batch(self.sock, []), 0)
+        self.assertFalse(self.libc.sendmmsg.called)
+
+    def test_frame_batch_reuse(self):
+        self.libc.sendmmsg.side_effect = lambda fd, msgs, count, flags: count
+        batch = raw_socket.FrameBatch([FRAME] * 2)
+
+        self.assertEqual(batch.send(self.sock), 2)
+        self.assertEqual(batch.send(self.sock), 2)
+        self.assertEqual(self.libc.sendmmsg.call_count, 2)
+
+    def test_frame_batch_size_limits(self):
+        with self.assertRaises(ValueError):
+            raw_socket.FrameBatch([])
+        with self.assertRaises(ValueError):
+            raw_socket.FrameBatch([FRAME] * (raw_socket.MAX_BATCH + 1))
+
+    def test_send_repeated(self):
+        self.libc.sendmmsg.side_effect = lambda fd, msgs, count, flags: count
+
+        sent = raw_socket.send_repeated(self.sock, FRAME,
+                                        2 * raw_socket.MAX_BATCH + 3)
+
+        self.assertEqual(sent, 2 * raw_socket.MAX_BATCH + 3)
+        counts = [c[0][2] for c in self.libc.sendmmsg.call_args_list]
+        self.assertEqual(counts,
+                         [raw_socket.MAX_BATCH, raw_socket.MAX_BATCH, 3])
+
+    def _run_filter(self, program, frame):
+        """Interprets the BPF instructions _dst_filter() emits."""
+        insns = [
+            struct.unpack('HBBI', program[i:i + 8])
+            for i in range(0, len(program), 8)
+        ]
+        pc = acc = 0
+        while True:
+            code, jt, jf, k = insns[pc]
+            pc += 1
+            if code == raw_socket.BPF_RET_K:
+                return k
+            elif code == raw_socket.BPF_LD_W_ABS:
+                acc = struct.unpack('!I', frame[k:k + 4])[0]
+            elif code == raw_socket.BPF_LD_H_ABS:
+                acc = struct.unpack('!H', frame[k:k + 2])[0]
+            elif code == raw_socket.BPF_JEQ_K:
+                pc += jt if acc == k else jf
+            else:
+                self.fail('Unexpected BPF instruction %r' % code)
+
+    def test_dst_filter(self):
+        mac = b'\x02\x00\x00\x00\x00\x01'
+        arp = b'\x08\x06'
+        cases = [
+            (mac, arp, True),
+            (b'\xff' * 6, arp, True),
+            (b'\x02\x00\x00\x00\x00\x02', arp, False),
+            (b'\x02\x00\x00\x01\x00\x01', arp, False),
+            (b'\xff' * 5 + b'\x01', arp, False),
+            (mac, b'\x08\x00', False),
+            (b'\xff' * 6, b'\x08\x00', False),
+        ]
+        with_type = raw_socket._dst_filter(mac, 0x0806)
+        without_type = raw_socket._dst_filter(mac)
+        for dst, ethertype, accepted in cases:
+            frame = dst + b'\x02' * 6 + ethertype + b'\x00' * 46
+            self.assertEqual(self._run_filter(with_type, frame),
+                             raw_socket.MAX_FRAME_LEN if accepted else 0)
+            self.assertEqual(
+                self._run_filter(without_type, frame),
+                raw_socket.MAX_FRAME_LEN if dst in (mac, b'\xff' * 6) else 0)
+
+    @mock.patch('select.poll')
+    def test_wait_for_frame_skips_unmatched_frames(self, poll):
+        poll.return_value.poll.return_value = [(3, 1)]
+        incoming = ('lo', 0, 0, 1, b'')
+        outgoing = ('lo', 0, 0, 4, b'')
+        self.sock.recvfrom.side_effect = [(b'sent', outgoing),
+                                          (b'other', incoming),
+                                          (b'reply', incoming)]
+
+        frame = raw_socket.wait_for_frame(self.sock, 1,
+                                          lambda f: f == b'reply')
+
+        self.assertEqual(frame, b'reply')
+        self.assertEqual(self.sock.recvfrom.call_count, 3)
+
+    @mock.patch('select.poll')
+    def test_wait_for_frame_times_out_without_match(self, poll):
+        poll.return_value.poll.side_effect = [[(3, 1)], []]
+        self.sock.recvfrom.return_value = (b'other', ('lo', 0, 0, 1, b''))
+
+        self.assertIsNone(
+            raw_socket.wait_for_frame(self.sock, 1, lambda f: False))
+
+
+class TxRingTest(unittest.TestCase):
+    def setUp(self):
+        self.sock = mock.Mock()
+        patcher = mock.patch.object(raw_socket,
+                                    'open_socket',
+                                    return_value=self.sock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Back the ring with anonymous memory instead of the socket
+        real_mmap = mmap.mmap
+        patcher = mock.patch(
+            'mmap.mmap', side_effect=lambda fd, length: real_mmap(-1, length))
+        self.mmap = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _slot(self, ring, i):
+        offset = i * ring.frame_size
+        status, tp_len, tp_snaplen = struct.unpack_from(
+            'III', ring._map, offset)
+        data = offset + raw_socket.TPACKET2_DATA_OFFSET
+        return status, tp_len, tp_snaplen, ring._map[data:data + tp_len]
+
+    def test_frame_layout(self):
+        frames = [FRAME, FRAME[:20]]
+
+        ring = raw_socket.TxRing('eth0', frames)
+        self.addCleanup(ring.close)
+
+        frame_nr = raw_socket.TX_RING_FRAMES
+        self.assertEqual(ring.frame_nr, frame_nr)
+        self.assertEqual(ring.frame_size, mmap.PAGESIZE)
+        self.assertEqual(self.sock.setsockopt.call_args_list, [
+            mock.call(raw_socket.SOL_PACKET, raw_socket.PACKET_VERSION,
+                      struct.pack('i', raw_socket.TPACKET_V2)),
+            mock.call(
+                raw_socket.SOL_PACKET, raw_socket.PACKET_TX_RING,
+                struct.pack('IIII', mmap.PAGESIZE, frame_nr, mmap.PAGESIZE,
+                            frame_nr)),
+        ])
+        self.mmap.assert_called_once_with(self.sock.fileno.return_value,
+                                          mmap.PAGESIZE * frame_nr)
+        for i in range(frame_nr):
+            frame = frames[i % 2]
+            self.assertEqual(self._slot(ring, i),
+                             (0, len(frame), len(frame), frame))
+
+    def test_large_frames_grow_slots(self):
+        frame = b'\x01' * mmap.PAGESIZE
+
+        ring = raw_socket.TxRing('eth0', [frame])
+        self.addCleanup(ring.close)
+
+        self.assertEqual(ring.frame_size, 2 * mmap.PAGESIZE)
+        self.assertEqual(self._slot(ring, 1)[3], frame)
+
+    def test_send_hands_every_slot_to_the_kernel(self):
+        ring = raw_socket.TxRing('eth0', [FRAME])
+        self.addCleanup(ring.close)
+
+        self.assertEqual(ring.send(), raw_socket.TX_RING_FRAMES)
+
+        statuses = [self._slot(ring, i)[0] for i in range(ring.frame_nr)]
+        self.assertEqual(statuses, [raw_socket.TP_STATUS_SEND_REQUEST] *
+                         raw_socket.TX_RING_FRAMES)
+        self.sock.send.assert_called_once_with(b'')
+
+    def test_close(self):
+        ring = raw_socket.TxRing('eth0', [FRAME])
+        ring_map = ring._map
+
+        ring.close()
+
+        self.assertTrue(ring_map.closed)
+        self.sock.close.assert_called_once_with()
+
+    def test_unsupported_ring_closes_socket(self):
+        self.sock.setsockopt.side_effect = [None, OSError('unsupported')]
+
+        with self.assertRaises(OSError):
+            raw_socket.TxRing('eth0', [FRAME])
+        self.sock.close.assert_called_once_with()
+        self.assertFalse(self.mmap.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2020 - The Android Open Source Project
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import logging
+import threading
+import unittest
+from unittest import mock
+
+from acts.controllers import packet_sender
+
+PKT_GEN_CONFIG = {
+    'interf': 'eth0',
+    'subnet_mask': '255.255.255.0',
+    'src_mac': '02:00:00:00:00:01',
+    'dst_mac': '02:00:00:00:00:02',
+    'src_ipv4': '192.168.1.1',
+    'dst_ipv4': '192.168.1.2',
+    'gw_ipv4': '192.168.1.254',
+    'src_ipv6_type': 0x20,
+    'src_ipv6': 'fe80::1',
+    'dst_ipv6': 'fe80::2',
+}
+
+OTHER_MAC = '02:00:00:00:00:03'
+
+
+class CreateTest(unittest.TestCase):
+    def test_create(self):
+        senders = packet_sender.create(
+            ['eth0', {
+                'interface': 'eth1',
+                'txtime': True
+            }])
+        self.assertEqual([s.interface for s in senders], ['eth0', 'eth1'])
+        self.assertEqual([s.txtime for s in senders], [False, True])
+
+    def test_create_invalid_config(self):
+        with self.assertRaises(ValueError):
+            packet_sender.create([{'txtime': True}])
+
+
+class LazyScapyTest(unittest.TestCase):
+    @mock.patch('acts.controllers.packet_sender._warm_up_layers')
+    def test_first_use_imports_scapy(self, warm_up_layers):
+        stand_in = packet_sender._LazyScapy()
+        with mock.patch.object(packet_sender, 'scapy', stand_in):
+            self.assertIs(stand_in.Ether, packet_sender.scapy.Ether)
+            self.assertIsNot(packet_sender.scapy, stand_in)
+            stand_in.ARP
+        warm_up_layers.assert_called_once_with()
+
+    def test_import_logs_no_scapy_warnings(self):
+        records = []
+        handler = logging.Handler(logging.WARNING)
+        handler.emit = records.append
+        scapy_log = logging.getLogger('scapy')
+        scapy_log.addHandler(handler)
+        self.addCleanup(scapy_log.removeHandler, handler)
+        with mock.patch.object(packet_sender, 'scapy',
+                               packet_sender._LazyScapy()):
+            packet_sender._import_scapy()
+        self.assertEqual([record.getMessage() for record in records], [])
+
+
+class PacketSenderTest(unittest.TestCase):
+    @mock.patch('acts.controllers.packet_sender.time.sleep')
+    @mock.patch.multiple('acts.controllers.packet_sender.raw_socket',
+                         is_supported=mock.Mock(return_value=True),
+                         open_socket=mock.DEFAULT,
+                         open_rx_socket=mock.DEFAULT,
+                         drain=mock.DEFAULT,
+                         wait_for_frame=mock.DEFAULT)
+    def test_send_receive_ntimes_reuses_rx_socket(self, _, open_socket,
+                                                  open_rx_socket, **kwargs):
+        sender = packet_sender.PacketSender('eth0')
+        ping = packet_sender.Ping4Generator(**PKT_GEN_CONFIG).generate()
+        dot3 = packet_sender.Dot3Generator(**PKT_GEN_CONFIG).generate()
+
+        sender.send_receive_ntimes(ping, 2, 0.1)
+        sender.send_receive_ntimes(ping, 1, 0.1)
+        sender.send_receive_ntimes(dot3, 1, 0.1)
+
+        src_mac = packet_sender.scapy.mac2str(PKT_GEN_CONFIG['src_mac'])
+        self.assertEqual(open_rx_socket.call_args_list, [
+            mock.call('eth0', src_mac, packet_sender.ETH_TYPE_IP),
+            mock.call('eth0', src_mac, None),
+        ])
+        self.assertEqual(open_socket.return_value.send.call_count, 4)
+        self.assertEqual(kwargs['wait_for_frame'].call_count, 4)
+
+    @mock.patch('acts.controllers.packet_sender.time.sleep')
+    @mock.patch.multiple('acts.controllers.packet_sender.raw_socket',
+                         is_supported=mock.Mock(return_value=True),
+                         open_socket=mock.DEFAULT,
+                         open_rx_socket=mock.DEFAULT,
+                         drain=mock.DEFAULT,
+                         wait_for_frame=mock.DEFAULT)
+    def test_send_receive_ntimes_matches_replies(self, _, wait_for_frame,
+                                                 **kwargs):
+        scapy = packet_sender.scapy
+        sender = packet_sender.PacketSender('eth0')
+        request = packet_sender.ArpGenerator(**PKT_GEN_CONFIG).generate()
+
+        sender.send_receive_ntimes(request, 1, 0.1)
+
+        is_reply = wait_for_frame.call_args[0][2]
+        arp = request[scapy.ARP]
+        reply = scapy.ARP(op='is-at', hwsrc=OTHER_MAC, psrc=arp.pdst,
+                          hwdst=arp.hwsrc, pdst=arp.psrc)
+        unrelated = scapy.ARP(op='who-has', hwsrc=OTHER_MAC, psrc=arp.pdst,
+                              pdst=arp.psrc)
+        for dst in (PKT_GEN_CONFIG['src_mac'], packet_sender.MAC_BROADCAST):
+            self.assertTrue(is_reply(bytes(scapy.Ether(dst=dst) / reply)))
+            self.assertFalse(
+                is_reply(bytes(scapy.Ether(dst=dst) / unrelated)))
+
+    @mock.patch.multiple('acts.controllers.packet_sender.raw_socket',
+                         is_supported=mock.Mock(return_value=False))
+    @mock.patch('scapy.all.conf')
+    def test_send_ntimes_stops_on_socket_error(self, conf):
+        sock = conf.L2socket.return_value
+        sock.send.side_effect = [None, OSError('down'), None]
+        sender = packet_sender.PacketSender('eth0')
+        sender.log = mock.Mock()
+
+        sender.send_ntimes(b'\x00' * 60, 3, 0)
+
+        self.assertEqual(sock.send.call_count, 2)
+        self.assertTrue(sender.log.exception.called)
+
+    @mock.patch.multiple('acts.controllers.packet_sender.raw_socket',
+                         is_supported=mock.Mock(return_value=True),
+                         open_socket=mock.DEFAULT,
+                         send_batch=mock.DEFAULT)
+    def test_send_batch(self, open_socket, send_batch):
+        sender = packet_sender.PacketSender('eth0')
+
+        sender.send_batch([b'a', b'b', b'c'])
+
+        sock, frames = send_batch.call_args[0]
+        self.assertIs(sock, open_socket.return_value)
+        self.assertEqual(list(frames), [b'a', b'b', b'c'])
+
+    @mock.patch.multiple('acts.controllers.packet_sender.raw_socket',
+                         is_supported=mock.Mock(return_value=False))
+    @mock.patch('scapy.all.conf')
+    def test_send_batch_with_interval(self, conf):
+        sender = packet_sender.PacketSender('eth0')
+
+        sender.send_batch([b'a', b'b'], interval=0.001)
+
+        self.assertEqual(conf.L2socket.return_value.send.call_args_list,
+                         [mock.call(b'a'), mock.call(b'b')])
+
+    def test_send_batch_empty(self):
+        with self.assertRaises(packet_sender.PacketSenderError):
+            packet_sender.PacketSender('eth0').send_batch([])
+
+    @mock.patch.multiple('acts.controllers.packet_sender.raw_socket',
+                         is_supported=mock.Mock(return_value=False))
+    @mock.patch('scapy.all.conf')
+    def test_send_forever_stopped_by_close(self, conf):
+        sender = packet_sender.PacketSender('eth0')
+        frames_sent = []
+        repeated = threading.Event()
+
+        def send(frame):
+            frames_sent.append(frame)
+            if len(frames_sent) == 3:
+                repeated.set()
+
+        conf.L2socket.return_value.send.side_effect = send
+
+        thread = sender.send_forever([b'a', b'b'], 0.001)
+        self.assertTrue(repeated.wait(5))
+        sender.close()
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(frames_sent[:3], [b'a', b'b', b'a'])
+
+    @mock.patch.multiple('acts.controllers.packet_sender.raw_socket',
+                         is_supported=mock.Mock(return_value=False))
+    @mock.patch('scapy.all.conf')
+    def test_start_sending_stopped_by_close(self, conf):
+        sender = packet_sender.PacketSender('eth0')
+        sent = threading.Event()
+        conf.L2socket.return_value.send.side_effect = lambda _: sent.set()
+
+        sender.start_sending(b'a', 0.001)
+        thread = sender.thread_send
+        self.assertTrue(sent.wait(5))
+        sender.close()
+
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(sender.thread_active)
+        # The sender can start again once closed
+        sender.start_sending(b'a', 0.001)
+        sender.stop_sending()
+
+
+class ThreadSendPacketTest(unittest.TestCase):
+    def _make_thread(self, **kwargs):
+        return packet_sender.ThreadSendPacket(mock.Mock(), b'', 1,
+                                              mock.Mock(), mock.Mock(),
+                                              **kwargs)
+
+    @mock.patch('os.sched_setscheduler')
+    @mock.patch('os.sched_setaffinity')
+    def test_set_scheduling_defaults(self, setaffinity, setscheduler):
+        self._make_thread()._set_scheduling()
+        self.assertFalse(setaffinity.called)
+        self.assertFalse(setscheduler.called)
+
+    @mock.patch('os.sched_setscheduler')
+    @mock.patch('os.sched_setaffinity')
+    def test_set_scheduling(self, setaffinity, setscheduler):
+        self._make_thread(cpu_core=2, sched_priority=50)._set_scheduling()
+        setaffinity.assert_called_once_with(0, {2})
+        self.assertEqual(setscheduler.call_args[0][1],
+                         packet_sender.os.SCHED_FIFO)
+
+    @mock.patch('os.sched_setscheduler', side_effect=PermissionError)
+    def test_set_scheduling_without_permission(self, _):
+        thread = self._make_thread(sched_priority=50)
+        thread._set_scheduling()
+        self.assertTrue(thread.log.warning.called)
+
+    def test_run_sends_through_ring_until_stopped(self):
+        signal = threading.Event()
+        ring = mock.Mock()
+        ring.send.side_effect = lambda: signal.set()
+        thread = packet_sender.ThreadSendPacket(signal, [b''], 0, mock.Mock(),
+                                                mock.Mock(), ring=ring)
+        thread.run()
+        ring.send.assert_called_once_with()
+        ring.close.assert_called_once_with()
+        self.assertFalse(thread.sock.send.called)
+
+    @mock.patch('acts.controllers.packet_sender.clock.sleep_until_ns')
+    def test_run_skips_traceback_when_errors_are_silenced(self, _):
+        thread = self._make_thread()
+        thread.raw_packets = [b'']
+        thread.stop_signal.is_set.return_value = False
+        thread.sock.send.side_effect = OSError('down')
+        thread.log.isEnabledFor.return_value = False
+        thread.run()
+        thread.log.isEnabledFor.assert_called_once_with(
+            packet_sender.logging.ERROR)
+        self.assertFalse(thread.log.exception.called)
+
+    @mock.patch('acts.controllers.packet_sender.clock.sleep_until_ns')
+    def test_run_does_not_swallow_keyboard_interrupt(self, _):
+        thread = self._make_thread()
+        thread.raw_packets = [b'']
+        thread.stop_signal.is_set.return_value = False
+        thread.sock.send.side_effect = KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            thread.run()
+
+
+class _FakeFrameBatch(object):
+    """Records the frames and transmit times of each batch sent."""
+    sent = []
+
+    def __init__(self, frames, txtime=False):
+        self.frames = list(frames)
+        self.txtimes = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def set_txtimes(self, txtimes):
+        self.txtimes = list(txtimes)
+
+    def send(self, sock):
+        _FakeFrameBatch.sent.append((self.frames, self.txtimes))
+        return len(self.frames)
+
+
+@mock.patch('acts.controllers.packet_sender.clock.sleep_until_ns')
+@mock.patch('acts.controllers.packet_sender.clock.monotonic_ns',
+            return_value=1000)
+@mock.patch('acts.controllers.packet_sender.raw_socket.FrameBatch',
+            _FakeFrameBatch)
+class SendWithTxtimeTest(unittest.TestCase):
+    def setUp(self):
+        _FakeFrameBatch.sent = []
+        self.start = 1000 + packet_sender.TXTIME_LEAD_NS
+
+    def test_batches_cover_lookahead(self, *_):
+        step = packet_sender.TXTIME_LOOKAHEAD_NS // 10
+
+        packet_sender._send_with_txtime(mock.Mock(), [b'a', b'b', b'c'],
+                                        step / 1e9, count=20)
+
+        # 10 frames fit in the lookahead, rounded down to whole passes
+        self.assertEqual([len(frames) for frames, _ in _FakeFrameBatch.sent],
+                         [9, 9, 2])
+        frames = [f for batch, _ in _FakeFrameBatch.sent for f in batch]
+        self.assertEqual(frames, [b'a', b'b', b'c'] * 6 + [b'a', b'b'])
+        txtimes = [t for _, batch in _FakeFrameBatch.sent for t in batch]
+        self.assertEqual(txtimes,
+                         [self.start + i * step for i in range(20)])
+
+    def test_sub_nanosecond_interval(self, *_):
+        packet_sender._send_with_txtime(mock.Mock(), [b'a'], 1e-10, count=3)
+
+        self.assertEqual(_FakeFrameBatch.sent,
+                         [([b'a'] * 3, [self.start + i for i in range(3)])])
+
+
+class PacketGeneratorTest(unittest.TestCase):
+    def setUp(self):
+        for lookup in (packet_sender._if_hwaddr, packet_sender._if_addr,
+                       packet_sender._if_addr6):
+            lookup.cache_clear()
+            self.addCleanup(lookup.cache_clear)
+
+    @mock.patch('acts.controllers.packet_sender.get_if_addr6',
+                return_value='fe80::5')
+    @mock.patch('scapy.all.get_if_addr', return_value='192.168.1.5')
+    @mock.patch('scapy.all.get_if_hwaddr', return_value=OTHER_MAC)
+    def test_local_addresses_are_read_once(self, get_if_hwaddr, get_if_addr,
+                                           get_if_addr6):
+        config = dict(PKT_GEN_CONFIG,
+                      src_mac=packet_sender.GET_FROM_LOCAL_INTERFACE,
+                      src_ipv4=packet_sender.GET_FROM_LOCAL_INTERFACE,
+                      src_ipv6=packet_sender.GET_FROM_LOCAL_INTERFACE)
+        for _ in range(2):
+            arp = packet_sender.ArpGenerator(**config)
+            ns = packet_sender.NsGenerator(**config)
+
+        self.assertEqual(arp.src_mac, OTHER_MAC)
+        self.assertEqual(arp.src_ipv4, '192.168.1.5')
+        self.assertEqual(ns.src_ipv6, 'fe80::5')
+        get_if_hwaddr.assert_called_once_with('eth0')
+        get_if_addr.assert_called_once_with('eth0')
+        get_if_addr6.assert_called_once_with('eth0', 0x20)
+
+    @mock.patch('acts.controllers.packet_sender.time.monotonic')
+    @mock.patch('scapy.all.in6_getifaddr')
+    @mock.patch.object(packet_sender, '_if_addr6_index_time', None)
+    def test_get_if_addr6_reuses_addresses_within_ttl(self, in6_getifaddr,
+                                                      monotonic):
+        in6_getifaddr.return_value = [('fe80::5', 0x20, 'eth0'),
+                                      ('fe80::6', 0x20, 'eth0'),
+                                      ('d00d::5', 0, 'eth0')]
+        monotonic.return_value = 100
+
+        self.assertEqual(packet_sender.get_if_addr6('eth0', 0x20), 'fe80::5')
+        self.assertEqual(packet_sender.get_if_addr6('eth0', 0), 'd00d::5')
+        self.assertIsNone(packet_sender.get_if_addr6('wlan0', 0x20))
+        self.assertEqual(in6_getifaddr.call_count, 1)
+
+        monotonic.return_value += packet_sender.IF_ADDR6_CACHE_TTL + 1
+        in6_getifaddr.return_value = []
+        self.assertIsNone(packet_sender.get_if_addr6('eth0', 0x20))
+        self.assertEqual(in6_getifaddr.call_count, 2)
+
+    def _assert_default_is_cached(self, generator_class, *args):
+        generator = generator_class(**PKT_GEN_CONFIG)
+        first = generator.generate(*args)
+        self.assertIs(generator.generate(*args), first)
+        self.assertIs(generator.packet, first)
+        return generator
+
+    def test_arp_generate(self):
+        generator = self._assert_default_is_cached(packet_sender.ArpGenerator)
+        reply = generator.generate(op='is-at', eth_dst=OTHER_MAC)
+        self.assertEqual(reply[packet_sender.scapy.ARP].op, 2)
+        self.assertEqual(reply[packet_sender.scapy.Ether].dst, OTHER_MAC)
+        self.assertEqual(
+            generator.generate()[packet_sender.scapy.Ether].dst,
+            packet_sender.MAC_BROADCAST)
+
+    def test_dhcp_offer_generate(self):
+        generator = self._assert_default_is_cached(
+            packet_sender.DhcpOfferGenerator)
+        offer = generator.generate(dst_ip='192.168.1.3')
+        self.assertEqual(offer[packet_sender.scapy.BOOTP].yiaddr,
+                         '192.168.1.3')
+        dhcp = packet_sender.scapy.Ether(bytes(offer))[
+            packet_sender.scapy.DHCP]
+        self.assertIn(('server_id', PKT_GEN_CONFIG['src_ipv4']),
+                      dhcp.options)
+
+    def test_ns_generate(self):
+        generator = self._assert_default_is_cached(packet_sender.NsGenerator)
+        ns = generator.generate(ip_dst='fe80::3')
+        self.assertEqual(ns[packet_sender.scapy.IPv6].dst, 'ff02::1:ff00:3')
+        self.assertEqual(ns[packet_sender.scapy.Ether].dst,
+                         '33:33:ff:00:00:03')
+
+    def test_ra_generate(self):
+        generator = self._assert_default_is_cached(packet_sender.RaGenerator,
+                                                   100)
+        self.assertIsNot(generator.generate(200), generator.generate(100))
+        ra = generator.generate(100, True, 300)
+        self.assertTrue(ra.haslayer(packet_sender.scapy.ICMPv6NDOptRDNSS))
+
+    def test_ping_and_mdns_generate(self):
+        for generator_class in (packet_sender.Ping4Generator,
+                                packet_sender.Ping6Generator,
+                                packet_sender.Mdns4Generator,
+                                packet_sender.Mdns6Generator):
+            generator = self._assert_default_is_cached(generator_class)
+            packet = generator.generate(eth_dst=OTHER_MAC)
+            self.assertEqual(packet[packet_sender.scapy.Ether].dst, OTHER_MAC)
+
+    def test_override_leaves_template_untouched(self):
+        generator = packet_sender.Ping4Generator(**PKT_GEN_CONFIG)
+        template = generator.generate()
+
+        packet = generator.generate(eth_dst=OTHER_MAC)
+
+        self.assertIsNot(packet, template)
+        self.assertEqual(template[packet_sender.scapy.Ether].dst,
+                         PKT_GEN_CONFIG['dst_mac'])
+        self.assertEqual(packet[packet_sender.scapy.IP].dst,
+                         PKT_GEN_CONFIG['dst_ipv4'])
+
+    def test_generate_raw_matches_generate(self):
+        cases = {
+            packet_sender.ArpGenerator: [(), ('is-at', '192.168.1.3'),
+                                         ('RARP-req', )],
+            packet_sender.DhcpOfferGenerator: [(), (OTHER_MAC, '192.168.1.3')],
+            packet_sender.NsGenerator: [(), ('fe80::3', OTHER_MAC)],
+            packet_sender.Ping4Generator: [(), ('192.168.1.3', OTHER_MAC)],
+            packet_sender.Ping6Generator: [(), ('fe80::3', OTHER_MAC)],
+            packet_sender.Mdns4Generator: [(), ('224.0.0.1', OTHER_MAC)],
+            packet_sender.Mdns6Generator: [(), ('ff02::1', OTHER_MAC)],
+        }
+        for generator_class, args_list in cases.items():
+            generator = generator_class(**PKT_GEN_CONFIG)
+            for args in args_list:
+                with self.subTest(generator=generator_class.__name__,
+                                  args=args):
+                    self.assertEqual(generator.generate_raw(*args),
+                                     bytes(generator.generate(*args)))
+
+    def test_make_generator(self):
+        generator = packet_sender.Ping4Generator(**PKT_GEN_CONFIG)
+        generate = packet_sender.make_generator(generator.generate_raw,
+                                                eth_dst=OTHER_MAC)
+
+        self.assertEqual(generate(),
+                         generator.generate_raw(eth_dst=OTHER_MAC))
+        self.assertIs(generate(), generate())
+
+    def test_dot3_generate_raw_matches_generate(self):
+        generator = packet_sender.Dot3Generator(**PKT_GEN_CONFIG)
+        cases = {
+            'generate': [(), (OTHER_MAC, )],
+            'generate_llc': [(), (OTHER_MAC, 4, 5, 6)],
+            'generate_snap': [(), (None, 170, 170, 3, 0, 0x86dd)],
+        }
+        for method, args_list in cases.items():
+            for args in args_list:
+                with self.subTest(method=method, args=args):
+                    packet = getattr(generator, method)(*args)
+                    self.assertIs(getattr(generator, method)(*args), packet)
+                    self.assertEqual(
+                        getattr(generator, method + '_raw')(*args),
+                        bytes(packet))
+
+
+if __name__ == '__main__':
+    unittest.main()
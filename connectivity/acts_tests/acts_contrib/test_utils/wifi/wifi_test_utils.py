@@ -2337,13 +2337,14 @@ def get_ssrdumps(ad, test_name=""):
         ad.pull_files(logs, log_path)
     ad.adb.shell("find /data/vendor/ssrdump/ -type f -delete")
 
-def start_pcap(pcap, wifi_band, test_name):
+def start_pcap(pcap, wifi_band, test_name, extra_args=''):
     """Start packet capture in monitor mode.
 
     Args:
         pcap: packet capture object
         wifi_band: '2g' or '5g' or 'dual'
         test_name: test name to be used for pcap file name
+        extra_args: string of extra tcpdump options
 
     Returns:
         Dictionary with wifi band as key and the tuple
@@ -2358,7 +2359,8 @@ def start_pcap(pcap, wifi_band, test_name):
         bands = [wifi_band]
     procs = {}
     for band in bands:
-        proc = pcap.start_packet_capture(band, log_dir, test_name)
+        proc = pcap.start_packet_capture(band, log_dir, test_name,
+                                         extra_args)
         procs[band] = (proc, os.path.join(log_dir, test_name))
     return procs
 
@@ -14,8 +14,41 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import importlib
 import unittest
 
+# acts.utils and every module under acts_contrib.test_utils.* that is
+# expected to import.
+MODULES = [
+    'acts.utils',
+    'acts_contrib.test_utils.bt.BleEnum',
+    'acts_contrib.test_utils.bt.BluetoothBaseTest',
+    'acts_contrib.test_utils.bt.BluetoothCarHfpBaseTest',
+    'acts_contrib.test_utils.bt.BtEnum',
+    'acts_contrib.test_utils.bt.GattConnectedBaseTest',
+    'acts_contrib.test_utils.bt.GattEnum',
+    'acts_contrib.test_utils.bt.bt_contacts_utils',
+    'acts_contrib.test_utils.bt.bt_gatt_utils',
+    'acts_contrib.test_utils.bt.bt_test_utils',
+    'acts_contrib.test_utils.bt.native_bt_test_utils',
+    'acts_contrib.test_utils.car.car_bt_utils',
+    'acts_contrib.test_utils.car.car_media_utils',
+    'acts_contrib.test_utils.car.car_telecom_utils',
+    'acts_contrib.test_utils.car.tel_telecom_utils',
+    'acts_contrib.test_utils.net.connectivity_const',
+    'acts_contrib.test_utils.tel.TelephonyBaseTest',
+    'acts_contrib.test_utils.tel.tel_atten_utils',
+    'acts_contrib.test_utils.tel.tel_data_utils',
+    'acts_contrib.test_utils.tel.tel_defines',
+    'acts_contrib.test_utils.tel.tel_lookup_tables',
+    'acts_contrib.test_utils.tel.tel_subscription_utils',
+    'acts_contrib.test_utils.tel.tel_test_utils',
+    'acts_contrib.test_utils.tel.tel_video_utils',
+    'acts_contrib.test_utils.tel.tel_voice_utils',
+    'acts_contrib.test_utils.wifi.wifi_constants',
+    'acts_contrib.test_utils.wifi.wifi_test_utils',
+]
+
 
 class ActsImportTestUtilsTest(unittest.TestCase):
     """This test class has unit tests for the implementation of everything
@@ -27,43 +60,12 @@ class ActsImportTestUtilsTest(unittest.TestCase):
 
         This test will fail if any import was unsuccessful.
         """
-        try:
-            from acts import utils
-
-            from acts_contrib.test_utils.bt import BleEnum
-            from acts_contrib.test_utils.bt import BluetoothBaseTest
-            from acts_contrib.test_utils.bt import BluetoothCarHfpBaseTest
-            from acts_contrib.test_utils.bt import BtEnum
-            from acts_contrib.test_utils.bt import GattConnectedBaseTest
-            from acts_contrib.test_utils.bt import GattEnum
-            from acts_contrib.test_utils.bt import bt_contacts_utils
-            from acts_contrib.test_utils.bt import bt_gatt_utils
-            from acts_contrib.test_utils.bt import bt_test_utils
-            from acts_contrib.test_utils.bt import native_bt_test_utils
-
-            from acts_contrib.test_utils.car import car_bt_utils
-            from acts_contrib.test_utils.car import car_media_utils
-            from acts_contrib.test_utils.car import car_telecom_utils
-            from acts_contrib.test_utils.car import tel_telecom_utils
-
-            from acts_contrib.test_utils.net import connectivity_const
-            from acts_contrib.test_utils.net import connectivity_const
-
-            from acts_contrib.test_utils.tel import TelephonyBaseTest
-            from acts_contrib.test_utils.tel import tel_atten_utils
-            from acts_contrib.test_utils.tel import tel_data_utils
-            from acts_contrib.test_utils.tel import tel_defines
-            from acts_contrib.test_utils.tel import tel_lookup_tables
-            from acts_contrib.test_utils.tel import tel_subscription_utils
-            from acts_contrib.test_utils.tel import tel_test_utils
-            from acts_contrib.test_utils.tel import tel_video_utils
-            from acts_contrib.test_utils.tel import tel_voice_utils
-
-            from acts_contrib.test_utils.wifi import wifi_constants
-            from acts_contrib.test_utils.wifi import wifi_test_utils
-
-        except Exception:
-            self.fail('Unable to import all supported test_utils')
+        for name in MODULES:
+            with self.subTest(module=name):
+                try:
+                    importlib.import_module(name)
+                except Exception:
+                    self.fail('Unable to import %s' % name)
 
 
 if __name__ == '__main__':
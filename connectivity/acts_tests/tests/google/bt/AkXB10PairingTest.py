@@ -27,6 +27,10 @@ log = logging
 
 class AkXB10PairingTest(BluetoothBaseTest):
     DISCOVERY_TIME = 5
+    # Delays between polls for bonded devices grow from the initial to the
+    # maximum one (s)
+    BOND_POLL_INITIAL_DELAY = 0.1
+    BOND_POLL_MAX_DELAY = 2
 
     def setup_class(self):
         super().setup_class()
@@ -55,6 +59,11 @@ class AkXB10PairingTest(BluetoothBaseTest):
         self.dut.droid.bluetoothCancelDiscovery()
         return self.dut.droid.bluetoothGetDiscoveredDevices()
 
+    def _speaker_in(self, devices):
+        """Returns True if the speaker's address is among devices."""
+        addresses = {device['address'] for device in devices}
+        return self.ak_xb10_speaker.mac_address in addresses
+
     @BluetoothBaseTest.bt_test_wrap
     def test_speaker_on(self):
         """Test if the A&K XB10 speaker is powered on.
@@ -77,11 +86,10 @@ class AkXB10PairingTest(BluetoothBaseTest):
         Priority: 1
         """
 
-        for device in self._perform_classic_discovery():
-            if device['address'] == self.ak_xb10_speaker.mac_address:
-                self.dut.log.info("Desired device with MAC address %s found!",
-                                  self.ak_xb10_speaker.mac_address)
-                return True
+        if self._speaker_in(self._perform_classic_discovery()):
+            self.dut.log.info("Desired device with MAC address %s found!",
+                              self.ak_xb10_speaker.mac_address)
+            return True
         return False
 
     @BluetoothBaseTest.bt_test_wrap
@@ -110,12 +118,11 @@ class AkXB10PairingTest(BluetoothBaseTest):
         self.ak_xb10_speaker.power_off()
 
         device_not_found = True
-        for device in self._perform_classic_discovery():
-            if device['address'] == self.ak_xb10_speaker.mac_address:
-                self.dut.log.info(
-                    "Undesired device with MAC address %s found!",
-                    self.ak_xb10_speaker.mac_address)
-                device_not_found = False
+        if self._speaker_in(self._perform_classic_discovery()):
+            self.dut.log.info(
+                "Undesired device with MAC address %s found!",
+                self.ak_xb10_speaker.mac_address)
+            device_not_found = False
 
         # Set the speaker back to the normal for tear_down()
         self.ak_xb10_speaker.power_on()
@@ -151,16 +158,21 @@ class AkXB10PairingTest(BluetoothBaseTest):
         self.dut.droid.bluetoothDiscoverAndBond(
             self.ak_xb10_speaker.mac_address)
 
-        end_time = time.time() + 20
+        end_time = time.monotonic() + 20
+        delay = self.BOND_POLL_INITIAL_DELAY
+        # Look the RPC up once rather than through the SL4A proxy each poll
+        get_bonded_devices = self.dut.droid.bluetoothGetBondedDevices
         self.dut.log.info("Verifying devices are bonded")
-        while (time.time() < end_time):
-            bonded_devices = self.dut.droid.bluetoothGetBondedDevices()
-            for d in bonded_devices:
-                if d['address'] == self.ak_xb10_speaker.mac_address:
-                    self.dut.log.info("Successfully bonded to device.")
-                    self.log.info(
-                        "A&K XB10 Bonded devices:\n{}".format(bonded_devices))
-                    return True
+        while (time.monotonic() < end_time):
+            bonded_devices = get_bonded_devices()
+            if self._speaker_in(bonded_devices):
+                self.dut.log.info("Successfully bonded to device.")
+                self.log.info(
+                    "A&K XB10 Bonded devices:\n{}".format(bonded_devices))
+                return True
+            # Back off so the polling doesn't flood the RPC channel
+            time.sleep(min(delay, max(end_time - time.monotonic(), 0)))
+            delay = min(delay * 1.5, self.BOND_POLL_MAX_DELAY)
         # Timed out trying to bond.
         self.dut.log.info("Failed to bond devices.")
 
@@ -14,16 +14,20 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import functools
 import logging
+import queue
 import time
 
 import acts.signals as signals
 
 from acts import asserts
 from acts import base_test
+from acts import utils
 from acts.controllers import android_device
 from acts.controllers import attenuator
 from acts.test_decorators import test_tracker_info
+from acts_contrib.test_utils.wifi import wifi_constants
 from acts_contrib.test_utils.wifi import wifi_test_utils as wutils
 from acts_contrib.test_utils.wifi.WifiBaseTest import WifiBaseTest
 
@@ -42,6 +46,25 @@ LVL2_ATTN = 30
 MIN_ATTN = 0
 MAX_ATTN = 95
 ATTN_SLEEP = 12
+# Maximum time to wait for the DUT to connect to the expected BSSID
+CONNECT_TIMEOUT = 20
+# Interval between connection info checks while waiting to connect
+CONNECT_POLL_INTERVAL = 0.5
+# Capture with a 64 MiB kernel buffer and only the first 200 bytes of each
+# frame, enough for the radiotap and 802.11 headers
+PCAP_TCPDUMP_ARGS = '-B 65536 -s 200'
+# Names of the tests that run with packet capture, see requires_pcap()
+_PCAP_TESTS = set()
+
+
+def requires_pcap(func):
+    """Marks a test as one that runs with packet capture.
+
+    Capturing 2G and 5G traffic for every test costs setup time and disk
+    space, so only the tests marked with this decorator start a capture.
+    """
+    _PCAP_TESTS.add(func.__name__)
+    return func
 
 
 class WifiNetworkSelectorTest(WifiBaseTest):
@@ -61,24 +84,27 @@ class WifiNetworkSelectorTest(WifiBaseTest):
         self.dut.droid.wakeLockAcquireBright()
         self.dut.droid.wakeUpNow()
         self.dut.ed.clear_all_events()
-        self.pcap_procs = wutils.start_pcap(
-            self.packet_capture, 'dual', self.test_name)
-        for a in self.attenuators:
-            a.set_atten(MAX_ATTN)
+        self.pcap_procs = None
+        if self.test_name in _PCAP_TESTS:
+            self.pcap_procs = wutils.start_pcap(
+                self.packet_capture, 'dual', self.test_name,
+                PCAP_TCPDUMP_ARGS)
+        self.set_all_attenuators(MAX_ATTN)
         time.sleep(ATTN_SLEEP)
 
     def teardown_test(self):
-        for a in self.attenuators:
-            a.set_atten(MIN_ATTN)
+        self.set_all_attenuators(MIN_ATTN)
         wutils.reset_wifi(self.dut)
         self.dut.droid.wakeLockRelease()
         self.dut.droid.goToSleepNow()
 
     def on_pass(self, test_name, begin_time):
-        wutils.stop_pcap(self.packet_capture, self.pcap_procs, True)
+        if self.pcap_procs:
+            wutils.stop_pcap(self.packet_capture, self.pcap_procs, True)
 
     def on_fail(self, test_name, begin_time):
-        wutils.stop_pcap(self.packet_capture, self.pcap_procs, False)
+        if self.pcap_procs:
+            wutils.stop_pcap(self.packet_capture, self.pcap_procs, False)
         self.dut.take_bug_report(test_name, begin_time)
         self.dut.cat_adb_log(test_name, begin_time)
 
@@ -89,6 +115,29 @@ class WifiNetworkSelectorTest(WifiBaseTest):
 
     """ Helper Functions """
 
+    def set_all_attenuators(self, value):
+        """Sets every attenuator to the same value.
+
+        Attenuators of different instruments are set concurrently. The ones
+        of a single instrument are set one after another, since they share
+        its connection.
+
+        Args:
+            value: attenuation to set (dB)
+        """
+        instruments = {}
+        for a in self.attenuators:
+            instruments.setdefault(id(a.instrument), []).append(a)
+
+        def set_atten(attenuators):
+            for a in attenuators:
+                a.set_atten(value)
+
+        if instruments:
+            utils.run_concurrent_actions(
+                *[functools.partial(set_atten, attenuators)
+                  for attenuators in instruments.values()])
+
     def add_networks(self, ad, networks):
         """Add Wi-Fi networks to an Android device and verify the networks were
         added correctly.
@@ -97,14 +146,27 @@ class WifiNetworkSelectorTest(WifiBaseTest):
             ad: the AndroidDevice object to add networks to.
             networks: a list of dicts, each dict represents a Wi-Fi network.
         """
-        for network in networks:
-            ret = ad.droid.wifiAddNetwork(network)
+        # Issue the RPCs concurrently over the SL4A connection pool, so the
+        # round trips overlap instead of adding up.
+        add_futures = [ad.droid.future.wifiAddNetwork(network)
+                       for network in networks]
+        network_ids = []
+        for network, future in zip(networks, add_futures):
+            ret = future.result()
             asserts.assert_true(ret != -1,
                                 "Failed to add network %s" % network)
-            ad.droid.wifiEnableNetwork(ret, 0)
+            network_ids.append(ret)
+        enable_futures = [ad.droid.future.wifiEnableNetwork(network_id, 0)
+                          for network_id in network_ids]
+        for future in enable_futures:
+            future.result()
 
         configured_networks = ad.droid.wifiGetConfiguredNetworks()
-        self.log.info("Configured networks: %s", configured_networks)
+        # The full network list is large, so only dump it when debugging
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("Configured networks: %s", configured_networks)
+        else:
+            self.log.info("Configured %d networks", len(configured_networks))
 
     def connect_and_verify_connected_bssid(self, network):
         """Start a scan to get the DUT connected to an AP and verify the DUT
@@ -117,17 +179,52 @@ class WifiNetworkSelectorTest(WifiBaseTest):
             True if connection to given network happen, else return False.
         """
         expected_ssid = network['SSID']
-        expected_bssid = network['bssid']
-        wutils.start_wifi_connection_scan_and_ensure_network_found(
-            self.dut, expected_ssid)
-        time.sleep(20)
+        # BSSIDs are compared case-insensitively
+        expected_bssid = network['bssid'].lower()
+        bssid_key = WifiEnums.BSSID_KEY
+
+        def connected_bssid(network):
+            return ((network or {}).get(bssid_key) or '').lower()
+
+        def event_bssid(event):
+            return (event['data'].get(bssid_key) or '').lower()
+
+        self.dut.droid.wifiStartTrackingStateChange()
+        try:
+            # Every scan attempt clears all pending events, so a connection
+            # made during an earlier attempt is only visible in the
+            # connection info, which is checked once the scans are done.
+            wutils.start_wifi_connection_scan_and_ensure_network_found(
+                self.dut, expected_ssid)
+            actual_network = self.dut.droid.wifiGetConnectionInfo()
+            if connected_bssid(actual_network) == expected_bssid:
+                # Network selection runs a few seconds after the scan, so
+                # wait out the full timeout to catch a switch away.
+                event = self.dut.ed.wait_for_event(
+                    wifi_constants.WIFI_CONNECTED,
+                    lambda event: event_bssid(event) != expected_bssid,
+                    CONNECT_TIMEOUT)
+                asserts.fail("DUT switched from %s to %s" %
+                             (expected_bssid, event_bssid(event)))
+            else:
+                # Return as soon as the DUT connects to the expected BSSID
+                deadline = time.monotonic() + CONNECT_TIMEOUT
+                while time.monotonic() < deadline:
+                    time.sleep(CONNECT_POLL_INTERVAL)
+                    actual_network = self.dut.droid.wifiGetConnectionInfo()
+                    if connected_bssid(actual_network) == expected_bssid:
+                        break
+        except queue.Empty:
+            pass
+        finally:
+            self.dut.droid.wifiStopTrackingStateChange()
         actual_network = self.dut.droid.wifiGetConnectionInfo()
         self.log.info("Actual network: %s", actual_network)
-        asserts.assert_true(
-            actual_network and WifiEnums.BSSID_KEY in actual_network and \
-                expected_bssid == actual_network[WifiEnums.BSSID_KEY],
+        actual_bssid = connected_bssid(actual_network)
+        asserts.assert_equal(
+            actual_bssid, expected_bssid,
             "Expected BSSID: %s, Actual BSSID: %s" %
-            (expected_bssid, actual_network[WifiEnums.BSSID_KEY]))
+            (expected_bssid, actual_bssid))
         self.log.info("DUT connected to valid network: %s" % expected_bssid)
 
     """ Tests Begin """
@@ -216,6 +313,7 @@ class WifiNetworkSelectorTest(WifiBaseTest):
             self.reference_networks[AP_1]['5g'])
 
     @test_tracker_info(uuid="ab2c527c-0f9c-4f09-a13f-e3f461b7da52")
+    @requires_pcap
     def test_network_selector_blacklist_by_connection_failure(self):
         """
             1. Add two saved secured networks X and Y to DUT. X has stronger